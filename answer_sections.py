@@ -0,0 +1,209 @@
+# answer_sections.py
+# One-pass parser for the markdown answers the agent produces: headings, the section tag each
+# heading maps to (TOOLS, SKILLS, …), and the bullet / "Week X-Y:" items under it.
+# Shared by app.py and app_link_analysis.py for KG annotation and coloring, and by the local
+# extractor in knowledge_graph_formatter.
+
+import re
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+SECTION_ALIASES = {
+    "tools": "TOOLS",
+    "skills": "SKILLS",
+    "soft skills": "SOFT_SKILLS",
+    "projects": "PROJECTS",
+    "interview topics": "INTERVIEW_TOPICS",
+    "cloud & devops": "CLOUD",
+    "cloud and devops": "CLOUD",
+    "roadmap": "ROADMAP",
+    "overview": "OVERVIEW",
+}
+
+SECTION_PALETTE = {
+    "TOOLS": "#1f77b4",           # blue
+    "SKILLS": "#ff7f0e",          # orange
+    "PROJECTS": "#2ca02c",        # green
+    "INTERVIEW_TOPICS": "#d62728",# red
+    "CLOUD": "#9467bd",           # purple
+    "SOFT_SKILLS": "#8c564b",     # brown
+    "ROADMAP": "#17becf",         # teal
+    "OVERVIEW": "#7f7f7f",        # gray
+}
+
+_TITLE = re.compile(r"^#\s+(.+?)\s*$")
+_HEADING = re.compile(r"^#{2,3}\s+(.+?)\s*$")
+_GROUP = re.compile(r"^\s*\*\*(.+?)\*\*:?\s*$")   # "**Beginner**" sub-heading inside a section
+_BULLET = re.compile(r"^\s*[-*]\s+(.+?)\s*$")
+_WEEK_ITEM = re.compile(r"^(week\s*[\d\-–]+)\s*:", re.I)
+_WEEK_NAME = re.compile(r"^week\s*\d+(\s*[-–]\s*\d+)?$", re.I)
+# longest alias first so "Soft Skills" is SOFT_SKILLS rather than SKILLS
+_ALIAS = re.compile("|".join(re.escape(a) for a in sorted(SECTION_ALIASES, key=len, reverse=True)))
+_BOLD = re.compile(r"^\*\*?|\*\*$")
+_LEAD = re.compile(r"^[•\-–]\s*")
+_TRAILING_PAREN = re.compile(r"\s*\(.*?\)\s*$")
+_SPACES = re.compile(r"\s+")
+
+
+def is_week_name(name: str) -> bool:
+    return bool(_WEEK_NAME.match(name or ""))
+
+
+def norm(s: str) -> str:
+    s = (s or "").strip().lower()
+    s = unicodedata.normalize("NFKD", s)
+    return _SPACES.sub(" ", s)
+
+
+def clean_item(x: str) -> str:
+    x = _BOLD.sub("", x).strip()
+    x = _LEAD.sub("", x).strip()
+    return _TRAILING_PAREN.sub("", x).strip()
+
+
+@dataclass
+class SectionItem:
+    name: str                     # cleaned item text ("Week 1-2", "Pandas & NumPy")
+    text: str                     # the whole bullet / week line, markdown included
+    group: Optional[str] = None   # bold sub-heading it sits under, if any
+
+
+@dataclass
+class Section:
+    title: str
+    tag: Optional[str]            # None for headings that aren't a known section
+    items: List[SectionItem] = field(default_factory=list)
+
+
+@dataclass
+class SectionTree:
+    title: Optional[str]          # first "# " heading
+    sections: List[Section]
+    headings: List[str]           # every h2/h3 title, in order
+    bullets: List[str]            # every bullet text (raw), in order, including untagged sections
+    item_tags: Dict[str, str]     # norm(item) -> section tag
+
+    def tag_for(self, *names: str) -> Optional[str]:
+        for name in names:
+            tag = self.item_tags.get(norm(name))
+            if tag:
+                return tag
+        return None
+
+
+class SectionParser:
+    """Line-at-a-time parser behind parse_sections; also drives incremental consumers
+    (knowledge_graph_formatter.LocalGraphBuilder) that see the answer while it is still streaming."""
+
+    def __init__(self):
+        self.tree = SectionTree(None, [], [], [], {})
+        self._group: Optional[str] = None
+
+    @property
+    def current(self) -> Optional[Section]:
+        return self.tree.sections[-1] if self.tree.sections else None
+
+    def feed_line(self, line: str):
+        """Returns ("title", str) | ("section", Section) | ("item", SectionItem) | None."""
+        tree, current = self.tree, self.current
+        m = _HEADING.match(line)
+        if m:
+            heading = m.group(1)
+            tree.headings.append(heading)
+            alias = _ALIAS.search(norm(heading.rstrip(":")))
+            section = Section(heading, SECTION_ALIASES[alias.group(0)] if alias else None)
+            tree.sections.append(section)
+            self._group = None
+            return ("section", section)
+        if tree.title is None and current is None:
+            m = _TITLE.match(line)
+            if m:
+                tree.title = m.group(1)
+                return ("title", tree.title)
+        m = _BULLET.match(line)
+        if m:
+            text = item = m.group(1)
+            tree.bullets.append(text)
+        else:
+            g = _GROUP.match(line) if current is not None else None
+            if g:
+                self._group = g.group(1).strip()
+                return None
+            w = _WEEK_ITEM.match(line)
+            if not w:
+                return None
+            text, item = line.strip(), w.group(1)
+        if current is None:
+            return None
+        item = clean_item(item)
+        if not item:
+            return None
+        entry = SectionItem(item, text, self._group)
+        current.items.append(entry)
+        if current.tag:
+            tree.item_tags[norm(item)] = current.tag
+        return ("item", entry)
+
+
+def _parse(doc: str) -> SectionTree:
+    parser = SectionParser()
+    for line in (doc or "").splitlines():
+        parser.feed_line(line)
+    return parser.tree
+
+
+_cache: "OrderedDict[bytes, SectionTree]" = OrderedDict()
+_cache_lock = threading.Lock()
+_CACHE_SIZE = 64
+
+
+def parse_sections(doc: str) -> SectionTree:
+    """Parse once per distinct answer; Streamlit reruns hit the content-hash cache."""
+    key = hashlib.sha1((doc or "").encode("utf-8")).digest()
+    with _cache_lock:
+        tree = _cache.get(key)
+        if tree is not None:
+            _cache.move_to_end(key)
+            return tree
+    tree = _parse(doc)
+    with _cache_lock:
+        _cache[key] = tree
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return tree
+
+
+def annotate_sections(payload: dict, doc: str, match_headers: bool = True) -> dict:
+    """Add data.section to nodes so we can color/group by section."""
+    tree = parse_sections(doc)
+    for n in payload.get("nodes", []):
+        d = n.get("data", {})
+        name = d.get("name") or ""
+        sec = tree.tag_for(name, d.get("label") or "")
+        if not sec and is_week_name(name):
+            sec = "ROADMAP"
+        if not sec and match_headers:
+            # hub nodes named after the section itself ("Tools", "Cloud & DevOps", …)
+            sec = SECTION_ALIASES.get(norm(name))
+        if sec:
+            d["section"] = sec
+    return payload
+
+
+def colorize_by_section(payload: dict, relabel: bool = True) -> dict:
+    """Attach a color hex per node based on its data.section; with `relabel`, also set
+    data.group and duplicate name into label."""
+    for n in payload.get("nodes", []):
+        d = n.get("data", {})
+        sec = d.get("section")
+        if sec:
+            d["color"] = SECTION_PALETTE.get(sec, "#333333")
+            if relabel and "group" not in d:
+                d["group"] = sec
+        if relabel:
+            d["label"] = d.get("name") or d.get("label") or ""
+    return payload
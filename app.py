@@ -1,24 +1,77 @@
 # app.py
-import asyncio
+import atexit
+import copy
+import hashlib
 import traceback
 import httpx
 import json
-import re
-import unicodedata
 from itertools import cycle
 
 import streamlit as st
 from langchain_core.messages import HumanMessage, AIMessage
 
 # Build the KG from the latest answer
-from knowledge_graph_formatter import generate_graph_json
+from knowledge_graph_formatter import (
+    generate_graph_json, arace_graph_json, annotate_degree, extraction_chain, LocalGraphBuilder,
+)
+from answer_sections import annotate_sections, colorize_by_section
+import graph_compact
 
-# Your LangGraph compiled graph (adjust import if path differs)
-from gradpath_graph import compiled_graph  # noqa
+# Paraphrase-tolerant answer cache (shared with server.py when run in-process)
+from semantic_cache import semantic_cache, iter_replay, SEMANTIC_CACHE_ENABLED
+from history import history_manager
+
+from background import get_runner, get_jobs
+from resource_agent import aclose_http_clients
+
+JSON_PREVIEW_NODES = 150      # bigger graphs show a truncated compact preview + download
+JSON_PREVIEW_BYTES = 4000
+KG_POLL_SECONDS = 0.5         # how often a pending KG build is checked (fragment rerun only)
+LIVE_MAP_EVERY = 6            # redraw the streaming career map every N new nodes
+LIVE_MAP_MAX_NODES = 120      # past this the streaming map falls back to a count caption
 
 st.set_page_config(page_title="🎓 GradPath AI: Your AI Career Copilot", layout="wide")
 st.title("🎓 GradPath AI: Your AI Career Copilot")
 
+# -----------------------------------------------------------------------------
+# Resources: built once per process, shared by every rerun and session
+# -----------------------------------------------------------------------------
+@st.cache_resource(show_spinner="Loading the career agent…")
+def load_agent():
+    # Your LangGraph compiled graph (adjust import if path differs); compiling also binds the
+    # tools to the chat model, so this is the expensive part of a cold start
+    from gradpath_graph import compiled_graph
+    return compiled_graph
+
+@st.cache_resource(show_spinner=False)
+def load_catalog():
+    from role_agent import get_catalog
+    catalog = get_catalog()
+    catalog.data()   # parse role_mapping.json now rather than on the first tool call
+    return catalog
+
+@st.cache_resource(show_spinner=False)
+def load_kg_chains():
+    # strict + lenient extraction chains (one pooled HTTP client) used by "Generate KG"
+    try:
+        return [extraction_chain("gpt-4o-mini", 0.0, True), extraction_chain("gpt-4o-mini", 0.2, False)]
+    except Exception as e:   # e.g. no OPENAI_API_KEY yet; the registry builds them on first use
+        print("KG chains not prebuilt:", e)
+        return []
+
+@st.cache_resource(show_spinner=False)
+def load_background():
+    # One event loop per process for agent turns and KG builds (no asyncio.run per message)
+    runner = get_runner()
+    # the pooled AsyncClient lives on that loop; close it there when the process exits
+    atexit.register(lambda: runner.run(aclose_http_clients(), timeout=5))
+    return runner, get_jobs()
+
+compiled_graph = load_agent()
+catalog = load_catalog()
+load_kg_chains()
+runner, jobs = load_background()
+
 # -----------------------------------------------------------------------------
 # Session state
 # -----------------------------------------------------------------------------
@@ -44,126 +97,43 @@ def _render_history():
         with st.chat_message(role):
             st.markdown(m.content)
 
-def _norm(s: str) -> str:
-    s = (s or "").strip().lower()
-    s = unicodedata.normalize("NFKD", s)
-    s = re.sub(r"\s+", " ", s)
-    return s
-
-def _extract_sections_from_answer(doc: str):
-    """Map bullet items under headings to section tags (TOOLS, SKILLS, …)."""
-    SECTION_ALIASES = {
-        "tools": "TOOLS",
-        "skills": "SKILLS",
-        "soft skills": "SOFT_SKILLS",
-        "projects": "PROJECTS",
-        "interview topics": "INTERVIEW_TOPICS",
-        "cloud & devops": "CLOUD",
-        "cloud and devops": "CLOUD",
-        "roadmap": "ROADMAP",
-        "overview": "OVERVIEW",
-    }
-    blocks = re.split(r"(?m)^#{2,3}\s+", doc or "")
-    section_map = {}
-    for block in blocks:
-        lines = block.strip().splitlines()
-        if not lines:
-            continue
-        header = _norm(lines[0].rstrip(":"))
-        tag = None
-        for k, v in SECTION_ALIASES.items():
-            if _norm(k) in header:
-                tag = v
-                break
-        if not tag:
-            continue
-        body = "\n".join(lines[1:])
-        items = re.findall(r"(?m)^\s*[-*]\s+(.+?)\s*$", body)
-        items += re.findall(r"(?mi)^(week\s*[\d\-–]+)\s*:", body)
-        cleaned = []
-        for x in items:
-            x = re.sub(r"^\*\*?|\*\*$", "", x).strip()
-            x = re.sub(r"[•\-–]\s*", "", x).strip()
-            x = re.sub(r"\s*\(.*?\)\s*$", "", x).strip()
-            if x:
-                cleaned.append(x)
-        for it in cleaned:
-            section_map[_norm(it)] = tag
-    return section_map
-
-def _annotate_sections(payload: dict, doc: str) -> dict:
-    """Add data.section to nodes so we can color/group by section."""
-    section_map = _extract_sections_from_answer(doc)
-    for n in payload.get("nodes", []):
-        d = n.get("data", {})
-        name_norm = _norm(d.get("name"))
-        label_norm = _norm(d.get("label"))
-        sec = section_map.get(name_norm) or section_map.get(label_norm)
-        if not sec and re.match(r"(?i)^week\s*\d+(\s*[-–]\s*\d+)?$", d.get("name", "")):
-            sec = "ROADMAP"
-        if not sec and name_norm in {
-            "tools","skills","projects","interview topics","soft skills",
-            "cloud & devops","cloud and devops","roadmap","overview"
-        }:
-            sec = {
-                "tools":"TOOLS","skills":"SKILLS","projects":"PROJECTS","interview topics":"INTERVIEW_TOPICS",
-                "soft skills":"SOFT_SKILLS","cloud & devops":"CLOUD","cloud and devops":"CLOUD",
-                "roadmap":"ROADMAP","overview":"OVERVIEW",
-            }[name_norm]
-        if sec:
-            d["section"] = sec
-    return payload
-
-def _colorize_by_section(payload: dict) -> dict:
-    """Attach a color hex per node based on its data.section; duplicate name into label."""
-    PALETTE = {
-        "TOOLS": "#1f77b4",           # blue
-        "SKILLS": "#ff7f0e",          # orange
-        "PROJECTS": "#2ca02c",        # green
-        "INTERVIEW_TOPICS": "#d62728",# red
-        "CLOUD": "#9467bd",           # purple
-        "SOFT_SKILLS": "#8c564b",     # brown
-        "ROADMAP": "#17becf",         # teal
-        "OVERVIEW": "#7f7f7f",        # gray
-    }
-    for n in payload.get("nodes", []):
-        d = n.get("data", {})
-        sec = d.get("section")
-        if sec:
-            d["color"] = PALETTE.get(sec, "#333333")
-            if "group" not in d:
-                d["group"] = sec
-        d["label"] = d.get("name") or d.get("label") or ""
-    return payload
+# Inline styles for the legacy st_link_analysis API only; the current API styles through shared
+# NodeStyle/EdgeStyle classes and the elements carry no per-element style
+_NODE_STYLE = {
+    "color": "#222",
+    "font-size": "12px",
+    "text-wrap": "wrap",
+    "text-max-width": 120,
+    "text-valign": "center",
+    "text-halign": "center",
+    "background-opacity": 1,
+    "border-width": 1,
+    "border-color": "#222",
+}
+_EDGE_STYLE = {
+    "font-size": "10px",
+    "text-rotation": "autorotate",
+    "curve-style": "bezier",
+    "target-arrow-shape": "triangle",
+    "arrow-scale": 1.15,
+    "line-color": "#9e9e9e",
+    "target-arrow-color": "#9e9e9e",
+}
+_node_classes = {}
+
+def _node_class(color):
+    cls = _node_classes.get(color)
+    if cls is None:
+        cls = _node_classes[color] = {**_NODE_STYLE, "background-color": color} if color else _NODE_STYLE
+    return cls
 
 def _bake_inline_styles(payload: dict) -> dict:
-    """Hard-style every node/edge so labels & colors render even on old viewers."""
+    """Hard-style every node/edge so labels & colors render on the old viewer API."""
     for n in payload.get("nodes", []):
         d = n.get("data", {})
-        stl = n.setdefault("style", {})
-        if d.get("color"):
-            stl["background-color"] = d["color"]
-        stl["label"] = d.get("name") or d.get("label") or ""
-        stl["color"] = "#222"
-        stl["font-size"] = "12px"
-        stl["text-wrap"] = "wrap"
-        stl["text-max-width"] = 120
-        stl["text-valign"] = "center"
-        stl["text-halign"] = "center"
-        stl["background-opacity"] = 1
-        stl["border-width"] = 1
-        stl["border-color"] = "#222"
+        n["style"] = {**n.get("style", {}), **_node_class(d.get("color")), "label": d.get("name") or d.get("label") or ""}
     for e in payload.get("edges", []):
-        ed = e.get("data", {})
-        stl = e.setdefault("style", {})
-        stl["label"] = ed.get("label") or ""
-        stl["font-size"] = "10px"
-        stl["text-rotation"] = "autorotate"
-        stl["curve-style"] = "bezier"
-        stl["target-arrow-shape"] = "triangle"
-        stl["arrow-scale"] = 1.15
-        stl["line-color"] = "#9e9e9e"
-        stl["target-arrow-color"] = "#9e9e9e"
+        e["style"] = {**e.get("style", {}), **_EDGE_STYLE, "label": e.get("data", {}).get("label") or ""}
     return payload
 
 # -----------------------------------------------------------------------------
@@ -175,11 +145,9 @@ user_input = st.chat_input("Ask me anything about your AI/ML career path...")
 # -----------------------------------------------------------------------------
 # Streaming reply with resilient fallback
 # -----------------------------------------------------------------------------
-async def stream_reply(user_text: str, assistant_box):
-    history = st.session_state.chat_history + [HumanMessage(content=user_text)]
-    input_state = {"messages": history}
-    accumulated = ""
-
+async def reply_events(input_state: dict):
+    """Agent run on the background loop -> ("token" | "stop_reason" | "replace" | "error", text).
+    No Streamlit calls here; the script thread renders what it yields."""
     try:
         # token streaming via LangGraph
         async for event in compiled_graph.astream_events(input=input_state, version="v2"):
@@ -189,40 +157,240 @@ async def stream_reply(user_text: str, assistant_box):
                 chunk = data.get("chunk")
                 delta = getattr(chunk, "content", "") if chunk else ""
                 if delta:
-                    accumulated += delta
-                    assistant_box.markdown(accumulated)
+                    yield ("token", delta)
+            elif e == "on_chain_end" and not event.get("parent_ids"):
+                # agent budget (tool rounds / tokens / time) cut the run short
+                out = data.get("output")
+                reason = out.get("stop_reason") if isinstance(out, dict) else None
+                if reason:
+                    yield ("stop_reason", reason)
 
     except (httpx.RemoteProtocolError, httpx.ReadError, httpx.ConnectError):
         # stream dropped -> non-stream one-shot
         result = await compiled_graph.ainvoke(input_state)
         full_text = _extract_text_from_result(result)
         if full_text:
-            accumulated = full_text
-            assistant_box.markdown(accumulated)
+            yield ("replace", full_text)
         else:
-            assistant_box.markdown("❌ Streaming failed and fallback returned no text.")
-            st.code(traceback.format_exc(), language="python")
-            return
+            yield ("error", "❌ Streaming failed and fallback returned no text.\n" + traceback.format_exc())
     except Exception:
-        assistant_box.markdown("❌ Something went wrong while streaming. See trace below.")
-        st.code(traceback.format_exc(), language="python")
-        return
+        yield ("error", "❌ Something went wrong while streaming. See trace below.\n" + traceback.format_exc())
+
+def _live_dot(payload: dict) -> str:
+    """Graphviz DOT for the streaming career map (rendered client-side, no extra install)."""
+    q = lambda s: json.dumps(str(s), ensure_ascii=False)
+    lines = ["digraph G {", "rankdir=LR;",
+             'node [shape=box, style="rounded,filled", fillcolor="#f5f5f5", fontsize=10];']
+    for n in payload["nodes"]:
+        d = n["data"]
+        lines.append(f'{q(d["id"])} [label={q(d.get("name") or d.get("label") or d["id"])}];')
+    for e in payload["edges"]:
+        d = e["data"]
+        lines.append(f'{q(d["source"])} -> {q(d["target"])};')
+    lines.append("}")
+    return "\n".join(lines)
+
+def stream_reply(user_text: str, assistant_box, map_box=None):
+    # windowed + summarized history keeps per-turn prompt size flat in long chats
+    history = history_manager.prepare(st.session_state.chat_history + [HumanMessage(content=user_text)])
+    input_state = {"messages": history}
+    accumulated = ""
+    # career map grows line by line as the answer streams (no LLM); reused by the KG expander
+    live = LocalGraphBuilder()
+    drawn = [0]   # node count at the last redraw
+
+    def draw_map(force: bool = False):
+        nodes = len(live.graph.nodes)
+        if map_box is None or not nodes or (not force and nodes - drawn[0] < LIVE_MAP_EVERY):
+            return
+        drawn[0] = nodes
+        if nodes > LIVE_MAP_MAX_NODES:
+            map_box.caption(f"🗺️ Career map so far: {nodes} nodes · {len(live.graph.edges)} edges")
+        else:
+            map_box.graphviz_chart(_live_dot(live.payload()))
+
+    def grow_map(delta: str):
+        live.feed(delta)
+        draw_map()
+
+    # Only standalone questions are cacheable; follow-ups depend on the conversation
+    use_cache = SEMANTIC_CACHE_ENABLED and not st.session_state.chat_history
+    cached = semantic_cache.lookup(user_text) if use_cache else None
+
+    if cached is not None:
+        for delta in iter_replay(cached, words_per_chunk=16):
+            accumulated += delta
+            assistant_box.markdown(accumulated)
+            grow_map(delta)
+        use_cache = False
+    else:
+        # the run lives on the shared background loop; this thread only renders
+        for kind, text in runner.stream(reply_events(input_state)):
+            if kind == "token":
+                accumulated += text
+                assistant_box.markdown(accumulated)
+                grow_map(text)
+            elif kind == "stop_reason":
+                use_cache = False   # budget-truncated answers aren't cached
+                accumulated += f"\n\n_(stopped early: {text})_"
+                assistant_box.markdown(accumulated)
+            elif kind == "replace":
+                accumulated = text
+                assistant_box.markdown(accumulated)
+                live = LocalGraphBuilder().feed(text)
+                draw_map(force=True)
+            elif kind == "error":
+                message, _, trace = text.partition("\n")
+                assistant_box.markdown(message)
+                st.code(trace, language="python")
+                return
 
     # finalize/history
     assistant_box.markdown(accumulated)
+    if use_cache:
+        semantic_cache.store(user_text, accumulated)
     st.session_state.chat_history.append(HumanMessage(content=user_text))
     st.session_state.chat_history.append(AIMessage(content=accumulated))
     st.session_state.last_answer = accumulated
+    st.session_state.live_graph = {"answer": accumulated, "payload": live.close().payload()}
+    draw_map(force=True)
 
 if user_input:
     with st.chat_message("user"):
         st.markdown(user_input)
-    assistant_box = st.chat_message("assistant").empty()
-    asyncio.run(stream_reply(user_input, assistant_box))
+    with st.chat_message("assistant"):
+        assistant_box = st.empty()
+        map_box = st.empty()
+    stream_reply(user_input, assistant_box, map_box)
 
 # -----------------------------------------------------------------------------
 # KG: Build strictly from the latest answer, never empty, and visualize
 # -----------------------------------------------------------------------------
+def _local_kg(last: str, topic: str):
+    # local structural graph (no LLM, never empty); the live map built during streaming is
+    # the same graph, so reuse it when it's for this answer
+    live = st.session_state.get("live_graph") or {}
+    if live.get("answer") == last:
+        payload = annotate_degree(copy.deepcopy(live["payload"]))
+        if topic.strip():
+            payload["nodes"][0]["data"]["name"] = topic   # root node
+        return payload
+    return generate_graph_json(last, topic=topic or "Answer", engine="local")
+
+@st.fragment(run_every=KG_POLL_SECONDS)
+def _kg_progress(job_id: str):
+    """Re-runs on its own (not the whole page) until the build finishes, then reruns the app."""
+    job = jobs.get(job_id)
+    if job is None or job.done:
+        st.rerun()
+    st.info(f"⏳ Generating graph… {job.elapsed:.0f}s (you can keep chatting)")
+
+_LINK_PALETTE = [
+    "#FF7F3E", "#2A629A", "#FF6B6B", "#4ECDC4",
+    "#45B7D1", "#96CEB4", "#FFEAA7", "#8D6E63",
+    "#9C27B0", "#17becf", "#2ca02c", "#ff7f0e",
+]
+
+@st.cache_resource(show_spinner=False)
+def _link_styles(groups: tuple, edge_labels: tuple):
+    """st_link_analysis NodeStyle/EdgeStyle objects, built once per (groups, edge labels)."""
+    from st_link_analysis import NodeStyle, EdgeStyle
+
+    palette = cycle(_LINK_PALETTE)
+    # Title shown on node = 'name'; subtitle = 'description'
+    node_styles = [NodeStyle(g, next(palette), "name", "description") for g in groups]
+    edge_styles = [EdgeStyle(lbl, caption="label", directed=True) for lbl in edge_labels]
+    return node_styles, edge_styles
+
+def _payload_key(payload: dict) -> str:
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _prepare_kg(payload_key: str, _payload: dict, last: str) -> dict:
+    """Post-processing memoized on the payload hash: layout changes and other reruns reuse it."""
+    payload = annotate_sections(copy.deepcopy(_payload), last)
+    payload = colorize_by_section(payload)
+
+    # pretty JSON only for small graphs; the columnar form is ~3x smaller than indented JSON
+    compact = graph_compact.dumps(payload)
+    pretty = json.dumps(payload, indent=2) if len(payload["nodes"]) <= JSON_PREVIEW_NODES else None
+
+    # KEY: NodeStyle matches on data['label'] → set it to the GROUP (SECTION, fallback OTHER)
+    for n in payload["nodes"]:
+        n["data"]["label"] = n["data"].get("section") or "OTHER"
+    groups = sorted({n["data"]["label"] for n in payload["nodes"]})
+    edge_labels = sorted({e["data"].get("label", "RELATED") for e in payload["edges"]})
+    return {"payload": payload, "compact": compact, "pretty": pretty,
+            "groups": tuple(groups), "edge_labels": tuple(edge_labels)}
+
+def _render_kg(payload: dict, reason: str, last: str):
+    prepared = _prepare_kg(_payload_key(payload), payload, last)
+    payload, compact = prepared["payload"], prepared["compact"]
+
+    st.caption(f"KG built via: **{reason}** mode")
+    st.subheader("JSON")
+    st.caption(
+        f"{len(payload['nodes'])} nodes · {len(payload['edges'])} edges · "
+        f"compact {len(compact) / 1024:.1f} KB"
+    )
+    if prepared["pretty"] is not None:
+        st.code(prepared["pretty"], language="json")
+    else:
+        st.code(compact[:JSON_PREVIEW_BYTES].decode("utf-8", "ignore") + " …", language="json")
+    st.download_button(
+        "⬇️ Download graph (compact JSON)",
+        compact,
+        file_name="career_graph.compact.json",
+        mime="application/json",
+    )
+
+    # -------------------- Visualize (new API first, fallback to old) --------------------
+    try:
+        # New API (NodeStyle / EdgeStyle / LAYOUTS)
+        from st_link_analysis import st_link_analysis, LAYOUTS
+
+        elements = {"nodes": payload["nodes"], "edges": payload["edges"]}
+        node_styles, edge_styles = _link_styles(prepared["groups"], prepared["edge_labels"])
+
+        layout_names = list(LAYOUTS.keys())
+        chosen = st.selectbox(
+            "Layout",
+            layout_names,
+            index=layout_names.index("cose") if "cose" in layout_names else 0,
+        )
+
+        st_link_analysis(
+            elements,
+            layout=chosen,
+            node_styles=node_styles,
+            edge_styles=edge_styles,
+            key=f"NODE_ACTIONS_{len(elements['nodes'])}_{len(elements['edges'])}",
+            node_actions=[],   # add ['remove','expand'] if you wire callbacks
+            on_change=lambda: None,
+        )
+
+    except Exception:
+        # Old API fallback with inline styles
+        try:
+            from st_link_analysis import st_link_analysis
+        except Exception as e:
+            st.warning(
+                "Could not render with `st-link-analysis`. Ensure it's installed and restart Streamlit. "
+                f"Import error: {e}"
+            )
+        else:
+            CONFIG = {
+                "layout": "cose",
+                "edgeArrows": True,
+                "nodeSizeProp": "degree",
+                "nodeSizeRange": [22, 64],
+            }
+            payload = _bake_inline_styles(payload)   # cache_data hands out a copy; safe to style in place
+            try:
+                st_link_analysis(payload["nodes"], payload["edges"], config=CONFIG)
+            except TypeError:
+                st_link_analysis(payload)
+
 st.markdown("---")
 with st.expander("🔗 Build Knowledge Graph from this answer", expanded=False):
     last = st.session_state.get("last_answer", "")
@@ -235,154 +403,50 @@ with st.expander("🔗 Build Knowledge Graph from this answer", expanded=False):
         key=f"kg_topic_{len(st.session_state.chat_history)}",
     )
 
+    # llm: model extraction; hybrid: structural graph + model enrichment; local: no model call
+    engine = st.selectbox(
+        "Graph engine",
+        ["llm", "hybrid", "local"],
+        key=f"kg_engine_{len(st.session_state.chat_history)}",
+    )
+
     if st.button("✨ Generate KG", key=f"kg_btn_{len(st.session_state.chat_history)}"):
         if not last.strip():
             st.error("No assistant answer captured yet. Ask a question first, then build the graph.")
         else:
-            # -------------------- Build KG with fallbacks --------------------
-            with st.spinner("Generating graph…"):
-                # 1) strict (best quality)
-                payload = generate_graph_json(
+            previous = st.session_state.get("kg_job") or {}
+            if previous.get("id"):
+                jobs.cancel(previous["id"])
+            kg_job = {"id": None, "answer": last, "topic": topic, "engine": engine}
+            if engine != "local":
+                # 1) strict and 2) lenient race each other on the background loop: strict wins if
+                # non-empty within KG_RACE_DEADLINE, else lenient; ~one LLM round trip worst case
+                kg_job["id"] = jobs.submit("kg", arace_graph_json(
                     last,
                     topic=topic,
                     model="gpt-4o-mini",
                     temperature=0.0,
-                    auto_label=False,
+                    lenient_temperature=0.2,
                     add_degree=True,
-                    strict=True,
-                )
-                reason = "strict"
-
-                # 2) lenient fallback
-                if not payload or not payload.get("nodes"):
-                    payload = generate_graph_json(
-                        last,
-                        topic=topic,
-                        model="gpt-4o-mini",
-                        temperature=0.2,
-                        auto_label=True,
-                        add_degree=True,
-                        strict=False,
-                    )
-                    reason = "lenient"
-
-                # 3) heuristic fallback (never empty)
-                if not payload or not payload.get("nodes"):
-                    def quick_heuristic_graph(doc: str, topic_text: str) -> dict:
-                        heads = re.findall(r"(?m)^#{2,3}\s+(.+?)\s*$", doc)
-                        bullets = re.findall(r"(?m)^\s*[-*]\s+(.+?)\s*$", doc)
-                        seen, items = set(), []
-                        for s in (heads + bullets):
-                            s = re.sub(r"^\s+|\s+$", "", s)
-                            s = re.sub(r"\s+", " ", s).strip(" -•:").strip()
-                            if len(s) >= 3 and s.lower() not in seen:
-                                seen.add(s.lower()); items.append(s)
-                            if len(items) >= 12:
-                                break
-                        nodes, edges = [], []
-                        hub_id = "hub"
-                        nodes.append({"data": {
-                            "id": hub_id, "name": topic_text or "GradPath", "label": topic_text or "GradPath",
-                            "description": "Auto-created hub (heuristic fallback).",
-                            "section": "OVERVIEW", "color": "#7f7f7f", "degree": max(1, len(items))
-                        }})
-                        for i, text in enumerate(items, start=1):
-                            nid = f"node_{i}"
-                            nodes.append({"data": {
-                                "id": nid, "name": text, "label": text, "description": text,
-                                "section": "ITEM", "color": "#2A629A", "degree": 1
-                            }})
-                            edges.append({"data": {"id": f"edge_{i}", "source": hub_id, "target": nid, "label": "RELATED_TO"}})
-                        return {"nodes": nodes, "edges": edges}
-
-                    payload = quick_heuristic_graph(last, topic or "Answer")
-                    reason = "heuristic"
-
-            # Post-process
-            payload = _annotate_sections(payload, last)
-            payload = _colorize_by_section(payload)
-
-            st.caption(f"KG built via: **{reason}** mode")
-            st.subheader("JSON")
-            st.code(json.dumps(payload, indent=2), language="json")
-
-            # -------------------- Visualize (new API first, fallback to old) --------------------
-            try:
-                # New API (NodeStyle / EdgeStyle / LAYOUTS)
-                from st_link_analysis import st_link_analysis, NodeStyle, EdgeStyle, LAYOUTS
-
-                elements = {"nodes": payload["nodes"], "edges": payload["edges"]}
-
-                # Group strictly by SECTION (fallback OTHER)
-                groups = sorted({
-                    n["data"].get("section") or "OTHER"
-                    for n in elements["nodes"]
-                })
-
-                palette = cycle([
-                    "#FF7F3E", "#2A629A", "#FF6B6B", "#4ECDC4",
-                    "#45B7D1", "#96CEB4", "#FFEAA7", "#8D6E63",
-                    "#9C27B0", "#17becf", "#2ca02c", "#ff7f0e",
-                ])
-
-                node_styles = []
-                for g in groups:
-                    color = next(palette)
-                    # KEY: NodeStyle matches on data['label'] → set it to the GROUP
-                    for n in elements["nodes"]:
-                        if (n["data"].get("section") or "OTHER") == g:
-                            n["data"]["label"] = g
-                    # Title shown on node = 'name'; subtitle = 'description'
-                    node_styles.append(NodeStyle(g, color, "name", "description"))
-
-                edge_labels = sorted({e["data"].get("label", "RELATED") for e in elements["edges"]})
-                edge_styles = [EdgeStyle(lbl, caption="label", directed=True) for lbl in edge_labels]
-
-                # Bake inline labels/colors too so text shows regardless of theme
-                payload = _bake_inline_styles(payload)
-                elements = {"nodes": payload["nodes"], "edges": payload["edges"]}
-
-                layout_names = list(LAYOUTS.keys())
-                chosen = st.selectbox(
-                    "Layout",
-                    layout_names,
-                    index=layout_names.index("cose") if "cose" in layout_names else 0,
-                )
-
-                st_link_analysis(
-                    elements,
-                    layout=chosen,
-                    node_styles=node_styles,
-                    edge_styles=edge_styles,
-                    key=f"NODE_ACTIONS_{len(elements['nodes'])}_{len(elements['edges'])}",
-                    node_actions=[],   # add ['remove','expand'] if you wire callbacks
-                    on_change=lambda: None,
-                )
-
-            except Exception:
-                # Old API fallback with inline styles
+                    engine=engine,
+                    local_fallback=False,   # 3) below reuses the live map instead
+                )).id
+            st.session_state.kg_job = kg_job
+
+    # -------------------- Poll / show the build for the current answer --------------------
+    kg_job = st.session_state.get("kg_job")
+    if kg_job and kg_job["answer"] == last:
+        job = jobs.get(kg_job["id"])
+        if job is not None and not job.done:
+            _kg_progress(job.id)
+        else:
+            payload, reason = None, None
+            if job is not None:
                 try:
-                    from st_link_analysis import st_link_analysis
+                    payload, reason = job.result()
                 except Exception as e:
-                    st.warning(
-                        "Could not render with `st-link-analysis`. Ensure it's installed and restart Streamlit. "
-                        f"Import error: {e}"
-                    )
-                else:
-                    payload = _bake_inline_styles(payload)
-                    CONFIG = {
-                        "layout": "cose",
-                        "edgeArrows": True,
-                        "nodeSizeProp": "degree",
-                        "nodeSizeRange": [22, 64],
-                    }
-                    try:
-                        st_link_analysis(payload["nodes"], payload["edges"], config=CONFIG)
-                    except TypeError:
-                        st_link_analysis(payload)
-
-
-
-
-                
-
+                    st.warning(f"Graph extraction failed, using the local graph: {e}")
+            if not payload or not payload.get("nodes"):
+                payload = _local_kg(last, kg_job["topic"])
+                reason = "local" if kg_job["engine"] == "local" else "local fallback"
+            _render_kg(payload, reason, last)
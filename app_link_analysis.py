@@ -77,10 +77,9 @@
 
 # app_link_analysis.py
 import json
-import re
-import unicodedata
 import streamlit as st
 from knowledge_graph_formatter import generate_graph_json, save_graph_json
+from answer_sections import annotate_sections, colorize_by_section
 
 st.set_page_config(page_title="KG → Link Analysis", layout="wide")
 st.title("🔗 Knowledge Graph → Link Analysis")
@@ -110,75 +109,9 @@ def ensure_degree(payload: dict) -> dict:
         pass
     return payload
 
-def _norm(s: str) -> str:
-    s = (s or "").strip().lower()
-    s = unicodedata.normalize("NFKD", s)
-    s = re.sub(r"\s+", " ", s)
-    return s
-
-def _extract_sections_from_text(doc: str):
-    SECTION_ALIASES = {
-        "tools": "TOOLS",
-        "skills": "SKILLS",
-        "soft skills": "SOFT_SKILLS",
-        "projects": "PROJECTS",
-        "interview topics": "INTERVIEW_TOPICS",
-        "cloud & devops": "CLOUD",
-        "cloud and devops": "CLOUD",
-        "roadmap": "ROADMAP",
-        "overview": "OVERVIEW",
-    }
-    blocks = re.split(r"(?m)^#{2,3}\s+", doc or "")
-    section_map = {}
-    for block in blocks:
-        lines = block.strip().splitlines()
-        if not lines:
-            continue
-        header = _norm(lines[0].rstrip(":"))
-        tag = None
-        for k, v in SECTION_ALIASES.items():
-            if _norm(k) in header:
-                tag = v
-                break
-        if not tag:
-            continue
-        body = "\n".join(lines[1:])
-        items = re.findall(r"(?m)^\s*[-*]\s+(.+?)\s*$", body)
-        items += re.findall(r"(?mi)^(week\s*[\d\-–]+)\s*:", body)
-        cleaned = []
-        for x in items:
-            x = re.sub(r"^\*\*?|\*\*$", "", x).strip()
-            x = re.sub(r"[•\-–]\s*", "", x).strip()
-            x = re.sub(r"\s*\(.*?\)\s*$", "", x).strip()
-            if x:
-                cleaned.append(x)
-        for it in cleaned:
-            section_map[_norm(it)] = tag
-    return section_map
-
 def annotate_sections_and_color(payload: dict, doc: str) -> dict:
-    section_map = _extract_sections_from_text(doc)
-    PALETTE = {
-        "TOOLS": "#1f77b4",
-        "SKILLS": "#ff7f0e",
-        "PROJECTS": "#2ca02c",
-        "INTERVIEW_TOPICS": "#d62728",
-        "CLOUD": "#9467bd",
-        "SOFT_SKILLS": "#8c564b",
-        "ROADMAP": "#17becf",
-        "OVERVIEW": "#7f7f7f",
-    }
-    for n in payload.get("nodes", []):
-        d = n.get("data", {})
-        name_norm = _norm(d.get("name"))
-        label_norm = _norm(d.get("label"))
-        sec = section_map.get(name_norm) or section_map.get(label_norm)
-        if not sec and re.match(r"(?i)^week\s*\d+(\s*[-–]\s*\d+)?$", d.get("name", "")):
-            sec = "ROADMAP"
-        if sec:
-            d["section"] = sec
-            d["color"] = PALETTE.get(sec, "#333333")
-    return payload
+    payload = annotate_sections(payload, doc, match_headers=False)
+    return colorize_by_section(payload, relabel=False)
 
 def render_graph(payload: dict, config: dict):
     try:
@@ -201,6 +134,8 @@ with st.sidebar:
     model = st.text_input("OpenAI model", "gpt-4o-mini")
     temperature = st.slider("Temperature", 0.0, 1.0, 0.1, 0.05)
     strict = st.checkbox("Strict (only use terms in text)", True)
+    engine = st.selectbox("Engine", ["llm", "hybrid", "local"], index=0,
+                          help="local: structural graph, no LLM call; hybrid: local graph + LLM enrichment")
 
     st.markdown("---")
     st.markdown("### Visualization Settings")
@@ -242,6 +177,7 @@ if generate:
                 auto_label=False,
                 add_degree=True,
                 strict=strict,
+                engine=engine,
             )
             if color_by_sections:
                 payload = annotate_sections_and_color(payload, doc)
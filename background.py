@@ -0,0 +1,154 @@
+# background.py
+# One long-lived asyncio loop per process for the Streamlit front end. Agent turns and KG builds
+# are submitted to it instead of asyncio.run() per message: no per-message loop setup/teardown,
+# pooled async clients stay bound to one loop, and jobs from several sessions/reruns overlap.
+# Streamlit elements are only touched from the script thread (results are streamed/polled back).
+
+import os
+import time
+import uuid
+import queue
+import asyncio
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Coroutine, Dict, Iterator, Optional
+
+JOB_TTL_SECONDS = float(os.getenv("JOB_TTL_SECONDS", "3600"))   # finished jobs kept for polling
+
+_ITEM, _ERROR, _END = range(3)
+
+
+class BackgroundLoop:
+    """An event loop running forever on a daemon thread."""
+
+    def __init__(self, name: str = "gradpath-loop"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro: Coroutine) -> Future:
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None):
+        """Run to completion from a sync caller (blocks that caller only)."""
+        return self.submit(coro).result(timeout)
+
+    def stream(self, events: AsyncIterator) -> Iterator:
+        """Iterate an async generator on the loop, yielding its items in the calling thread.
+        Closing the iterator early (Streamlit rerun/stop) cancels the upstream run."""
+        q: "queue.Queue" = queue.Queue()
+
+        async def pump():
+            try:
+                async for item in events:
+                    q.put((_ITEM, item))
+            except Exception as e:
+                q.put((_ERROR, e))
+            finally:
+                aclose = getattr(events, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+                q.put((_END, None))
+
+        future = self.submit(pump())
+        try:
+            while True:
+                kind, value = q.get()
+                if kind == _END:
+                    return
+                if kind == _ERROR:
+                    raise value
+                yield value
+        finally:
+            if not future.done():
+                future.cancel()
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    future: Future
+    meta: dict = field(default_factory=dict)
+    started: float = field(default_factory=time.time)
+    finished: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.future.done()
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.time()) - self.started
+
+    def result(self):
+        return self.future.result()
+
+
+class JobRegistry:
+    """Process-wide jobs by id; a Streamlit session keeps just the id in st.session_state and
+    polls across reruns."""
+
+    def __init__(self, runner: BackgroundLoop, ttl: float = JOB_TTL_SECONDS):
+        self.runner = runner
+        self.ttl = ttl
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, coro: Coroutine, **meta) -> Job:
+        job = Job(uuid.uuid4().hex, kind, self.runner.submit(coro), meta)
+        job.future.add_done_callback(lambda _: setattr(job, "finished", time.time()))
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: Optional[str]) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str):
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+        if job is not None:
+            job.future.cancel()
+
+    def _prune(self):
+        now = time.time()
+        stale = [jid for jid, j in self._jobs.items() if j.finished and now - j.finished > self.ttl]
+        for jid in stale:
+            del self._jobs[jid]
+
+    def stats(self) -> dict:
+        with self._lock:
+            running = sum(1 for j in self._jobs.values() if not j.done)
+            return {"entries": len(self._jobs), "running": running}
+
+
+_runner: Optional[BackgroundLoop] = None
+_jobs: Optional[JobRegistry] = None
+_lock = threading.Lock()
+
+
+def get_runner() -> BackgroundLoop:
+    global _runner
+    if _runner is None:
+        with _lock:
+            if _runner is None:
+                _runner = BackgroundLoop()
+    return _runner
+
+
+def get_jobs() -> JobRegistry:
+    global _jobs
+    if _jobs is None:
+        runner = get_runner()
+        with _lock:
+            if _jobs is None:
+                _jobs = JobRegistry(runner)
+    return _jobs
@@ -0,0 +1,2 @@
+# Offline benchmark harness: fake chat model, local YouTube/GitHub stand-ins, load generator.
+# Run with: python -m bench.run --help
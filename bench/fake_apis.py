@@ -0,0 +1,89 @@
+# bench/fake_apis.py
+# Local stand-ins for the YouTube Data API and GitHub search endpoints.
+
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+
+def _youtube_payload(query, n):
+    return {"items": [
+        {"id": {"videoId": f"vid{i:03d}"}, "snippet": {"title": f"{query} #{i + 1}"}}
+        for i in range(n)
+    ]}
+
+
+def _github_payload(query, n):
+    return {"items": [
+        {"name": f"repo-{i + 1}", "html_url": f"https://github.com/bench/repo-{i + 1}",
+         "description": f"Example project for {query}"}
+        for i in range(n)
+    ]}
+
+
+class FakeAPIServer:
+    """Serves /youtube/v3/search and /search/repositories on localhost with fixed latency."""
+
+    def __init__(self, latency: float = 0.15, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"   # keep-alive, like the real APIs
+
+            def do_GET(self):
+                server.requests += 1
+                url = urlsplit(self.path)
+                qs = parse_qs(url.query)
+                query = qs.get("q", [""])[0]
+                if url.path.endswith("/youtube/v3/search"):
+                    body = _youtube_payload(query, int(qs.get("maxResults", ["5"])[0]))
+                elif url.path.endswith("/search/repositories"):
+                    body = _github_payload(query, int(qs.get("per_page", ["5"])[0]))
+                else:
+                    self.send_error(404)
+                    return
+                time.sleep(server.latency)
+                data = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def youtube_url(self) -> str:
+        return f"{self.base_url}/youtube/v3/search"
+
+    @property
+    def github_url(self) -> str:
+        return f"{self.base_url}/search/repositories"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
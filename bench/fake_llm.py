@@ -0,0 +1,131 @@
+# bench/fake_llm.py
+# Deterministic chat model that streams at a fixed token rate and emits tool calls,
+# so the agent graph and KG formatter can be timed without OpenAI.
+
+import re
+import json
+import time
+import asyncio
+from typing import Any, AsyncIterator, Callable, Iterator, List, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+_TOKEN_RE = re.compile(r"\S+\s*|\s+")
+
+DEFAULT_TOOLS = ("get_role_info", "get_youtube_resources", "get_github_projects")
+
+
+def default_answer(messages: List[BaseMessage]) -> str:
+    """A realistic markdown answer rendered from role_mapping.json."""
+    from fast_path import render_role_answer
+    from role_agent import get_catalog
+
+    question = next((m.content for m in reversed(messages) if m.type == "human"), "")
+    roles = get_catalog().find_in_text(question) or get_catalog().roles()[:1]
+    return render_role_answer(roles[0], "roadmap")
+
+
+class FakeChatModel(BaseChatModel):
+    """Streams `answer_fn(messages)` at `tokens_per_sec`.
+
+    On the first turn of a conversation (no ToolMessage yet) it asks for every tool in
+    `tool_names` at once, mimicking the "roadmap + resources" pattern.
+    """
+
+    tokens_per_sec: float = 200.0
+    first_token_latency: float = 0.05
+    tool_names: List[str] = list(DEFAULT_TOOLS)
+    answer_fn: Callable[[List[BaseMessage]], str] = default_answer
+
+    @property
+    def _llm_type(self) -> str:
+        return "gradpath-fake"
+
+    def bind_tools(self, tools: Any, **kwargs: Any):
+        return self
+
+    # ---- script ----
+    def _wants_tools(self, messages: List[BaseMessage]) -> bool:
+        return bool(self.tool_names) and not any(isinstance(m, ToolMessage) for m in messages)
+
+    def _tool_calls(self, messages: List[BaseMessage]) -> List[dict]:
+        question = next((m.content for m in reversed(messages) if m.type == "human"), "")
+        from role_agent import get_catalog
+        roles = get_catalog().find_in_text(question) or ["Data Scientist"]
+        return [
+            {"name": name, "args": {"role": roles[0]}, "id": f"call_{i}"}
+            for i, name in enumerate(self.tool_names)
+        ]
+
+    def _tokens(self, messages: List[BaseMessage]) -> List[str]:
+        return _TOKEN_RE.findall(self.answer_fn(messages))
+
+    def _usage(self, messages, n_out):
+        n_in = sum(len(str(m.content)) for m in messages) // 4
+        return {"input_tokens": n_in, "output_tokens": n_out, "total_tokens": n_in + n_out}
+
+    # ---- BaseChatModel ----
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.first_token_latency)
+        if self._wants_tools(messages):
+            msg = AIMessage(content="", tool_calls=self._tool_calls(messages),
+                            usage_metadata=self._usage(messages, 20))
+        else:
+            tokens = self._tokens(messages)
+            time.sleep(len(tokens) / self.tokens_per_sec)
+            msg = AIMessage(content="".join(tokens), usage_metadata=self._usage(messages, len(tokens)))
+        return ChatResult(generations=[ChatGeneration(message=msg)])
+
+    def _tool_call_chunk(self, messages) -> ChatGenerationChunk:
+        chunks = [
+            {"name": c["name"], "args": json.dumps(c["args"]), "id": c["id"], "index": i, "type": "tool_call_chunk"}
+            for i, c in enumerate(self._tool_calls(messages))
+        ]
+        return ChatGenerationChunk(message=AIMessageChunk(
+            content="", tool_call_chunks=chunks, usage_metadata=self._usage(messages, 20)))
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.first_token_latency)
+        if self._wants_tools(messages):
+            yield self._tool_call_chunk(messages)
+            return
+        tokens = self._tokens(messages)
+        for tok in tokens:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=tok))
+            time.sleep(1.0 / self.tokens_per_sec)
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages, len(tokens))))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.first_token_latency)
+        if self._wants_tools(messages):
+            yield self._tool_call_chunk(messages)
+            return
+        tokens = self._tokens(messages)
+        for tok in tokens:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=tok))
+            await asyncio.sleep(1.0 / self.tokens_per_sec)
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages, len(tokens))))
+
+
+def kg_answer(messages: List[BaseMessage]) -> str:
+    """Graph JSON built from the bullets of the document in the KG prompt."""
+    prompt = str(messages[-1].content)
+    items = []
+    for m in re.finditer(r"(?m)^\s*[-*]\s+(.+?)\s*$", prompt):
+        name = m.group(1).strip("* ")
+        if name and name not in items:
+            items.append(name)
+        if len(items) >= 15:
+            break
+    nodes = [{"data": {"id": "hub", "label": "TOPIC", "name": "Roadmap", "description": "hub"}}]
+    edges = []
+    for i, name in enumerate(items):
+        nodes.append({"data": {"id": f"n{i}", "label": "ITEM", "name": name, "description": name}})
+        edges.append({"data": {"id": f"e{i}", "source": "hub", "target": f"n{i}", "label": "INCLUDES"}})
+    return json.dumps({"nodes": nodes, "edges": edges})
+
+
+def fake_kg_model(**kwargs) -> FakeChatModel:
+    return FakeChatModel(tool_names=[], answer_fn=kg_answer, **kwargs)
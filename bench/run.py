@@ -0,0 +1,294 @@
+# bench/run.py
+# Offline benchmarks for the agent graph, the /chat endpoint and the KG formatter.
+#
+#   python -m bench.run chat --concurrency 16 --requests 64
+#   python -m bench.run graph --requests 20
+#   python -m bench.run kg --requests 50
+#   python -m bench.run all --json bench_output.json --fail-p95-ms 5000
+#
+# Everything runs against a fake chat model and local YouTube/GitHub stand-ins,
+# so it needs no API keys or network and is safe to run in CI.
+
+import os
+import sys
+import json
+import math
+import time
+import socket
+import asyncio
+import argparse
+import resource
+import threading
+import statistics
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench-offline")
+# fake-model graphs must never land in the real on-disk KG cache (same model key as the app)
+os.environ["KG_CACHE_PATH"] = ""
+
+QUESTIONS = [
+    "What does a week-by-week plan look like for a Data Scientist?",
+    "Walk me through becoming an ML Engineer, with resources",
+    "Tell me about the LLM Engineer path and good GitHub projects",
+    "I want to move into NLP Engineer work, where do I start?",
+    "Gen AI Engineer: what should the first three months cover?",
+]
+
+# Canonical questions the fast path answers without the model
+FAST_QUESTIONS = [
+    "roadmap for Data Scientist",
+    "skills for ML Engineer",
+    "How do I become an LLM Engineer?",
+    "NLP Engineer roadmap",
+    "What skills does a Data Analyst need?",
+]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    # nearest rank: the smallest value with at least pct% of samples at or below it
+    k = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[k]
+
+
+def summarize(name, latencies, ttfts=None, tokens=0, wall=0.0, errors=0):
+    ms = [x * 1000 for x in latencies]
+    out = {
+        "name": name,
+        "requests": len(latencies),
+        "errors": errors,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(ms, 50), 2),
+        "p95_ms": round(percentile(ms, 95), 2),
+        "p99_ms": round(percentile(ms, 99), 2),
+        "mean_ms": round(statistics.fmean(ms), 2) if ms else 0.0,
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+    if ttfts is not None:
+        t = [x * 1000 for x in ttfts]
+        out.update({
+            "ttft_p50_ms": round(percentile(t, 50), 2),
+            "ttft_p95_ms": round(percentile(t, 95), 2),
+            "ttft_p99_ms": round(percentile(t, 99), 2),
+            "tokens_per_s": round(tokens / wall, 1) if wall else 0.0,
+        })
+    return out
+
+
+# -----------------------------------------------------------------------------
+# Fakes
+# -----------------------------------------------------------------------------
+def install_fakes(tokens_per_sec, first_token_latency, api_latency):
+    """Point the app at the fake model and local API stand-ins. Returns the API server."""
+    from bench.fake_apis import FakeAPIServer
+    from bench.fake_llm import FakeChatModel, fake_kg_model
+    import resource_agent
+    import gradpath_graph
+    import knowledge_graph_formatter
+
+    apis = FakeAPIServer(latency=api_latency).start()
+    resource_agent.YOUTUBE_SEARCH_URL = apis.youtube_url
+    resource_agent.GITHUB_SEARCH_URL = apis.github_url
+    resource_agent.resource_cache.clear()
+
+    fake = FakeChatModel(tokens_per_sec=tokens_per_sec, first_token_latency=first_token_latency)
+    gradpath_graph.chat_model = gradpath_graph.llm = fake
+    knowledge_graph_formatter.ChatOpenAI = lambda **kw: fake_kg_model(
+        tokens_per_sec=tokens_per_sec * 10, first_token_latency=first_token_latency)
+    knowledge_graph_formatter.clear_chains()
+    return apis
+
+
+# -----------------------------------------------------------------------------
+# Scenarios
+# -----------------------------------------------------------------------------
+async def bench_graph(n, concurrency):
+    from langchain_core.messages import HumanMessage
+    from gradpath_graph import compiled_graph
+
+    sem = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one(i):
+        nonlocal errors
+        async with sem:
+            t0 = time.perf_counter()
+            try:
+                await compiled_graph.ainvoke({"messages": [HumanMessage(content=QUESTIONS[i % len(QUESTIONS)])]})
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n)))
+    return summarize("graph.ainvoke", latencies, wall=time.perf_counter() - t0, errors=errors)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port):
+    import uvicorn
+    import server
+
+    config = uvicorn.Config(server.app, host="127.0.0.1", port=port, log_level="warning", lifespan="off")
+    srv = uvicorn.Server(config)
+    thread = threading.Thread(target=srv.run, daemon=True)
+    thread.start()
+    deadline = time.time() + 10
+    while not srv.started and time.time() < deadline:
+        time.sleep(0.02)
+    return srv
+
+
+def _token_text(fmt, line, sse_event):
+    """Model text carried by one NDJSON/SSE line, else None (tool results, status, framing).
+    `sse_event` is a one-item list holding the last SSE `event:` name."""
+    if fmt == "ndjson":
+        if not line.strip():
+            return None
+        ev = json.loads(line)
+        return ev.get("data") if ev.get("event") == "token" else None
+    if line.startswith("event:"):
+        sse_event[0] = line[len("event:"):].strip()
+    elif line.startswith("data:") and sse_event[0] == "token":
+        return json.loads(line[len("data:"):].strip())
+    return None
+
+
+async def bench_chat(n, concurrency, url=None, fmt="text", fast_path=False):
+    import httpx
+
+    srv = None
+    if url is None:
+        srv = start_server(_free_port())
+        url = f"http://127.0.0.1:{srv.config.port}"
+
+    sem = asyncio.Semaphore(concurrency)
+    latencies, ttfts, tokens, errors = [], [], 0, 0
+
+    async def one(client, i):
+        nonlocal tokens, errors
+        questions = FAST_QUESTIONS if fast_path else QUESTIONS
+        body = {"message": questions[i % len(questions)], "format": fmt,
+                "fast_path": fast_path, "cache": False}
+        async with sem:
+            t0 = time.perf_counter()
+            first = None
+            words = 0
+            try:
+                async with client.stream("POST", f"{url}/chat", json=body) as r:
+                    if fmt == "text":
+                        # plain text can't tell tool results from model tokens: latency only
+                        async for _ in r.aiter_bytes():
+                            pass
+                    else:
+                        sse_event = [None]
+                        async for line in r.aiter_lines():
+                            token = _token_text(fmt, line, sse_event)
+                            if token:
+                                if first is None:
+                                    first = time.perf_counter() - t0
+                                words += len(token.split())
+            except Exception:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - t0)
+            ttfts.append(first if first is not None else latencies[-1])
+            tokens += words
+
+    try:
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+            t0 = time.perf_counter()
+            await asyncio.gather(*(one(client, i) for i in range(n)))
+            wall = time.perf_counter() - t0
+    finally:
+        if srv is not None:
+            srv.should_exit = True
+    name = "/chat fast_path" if fast_path else f"/chat ({fmt})"
+    # TTFT / token rate need the framed formats (first "token" event, token payloads only)
+    return summarize(name, latencies, ttfts=None if fmt == "text" else ttfts, tokens=tokens,
+                     wall=wall, errors=errors)
+
+
+def bench_kg(n):
+    from bench.fake_llm import default_answer
+    from langchain_core.messages import HumanMessage
+    from knowledge_graph_formatter import generate_graph_json
+
+    doc = default_answer([HumanMessage(content="Data Scientist roadmap")])
+    latencies, errors = [], 0
+    t0 = time.perf_counter()
+    for _ in range(n):
+        t = time.perf_counter()
+        try:
+            # cold cache every time: measure generation, not lookups
+            payload = generate_graph_json(doc, topic="Data Scientist", strict=True, use_cache=False)
+            if not payload.get("nodes"):
+                errors += 1
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - t)
+    return summarize("generate_graph_json (cold cache)", latencies, wall=time.perf_counter() - t0, errors=errors)
+
+
+# -----------------------------------------------------------------------------
+# CLI
+# -----------------------------------------------------------------------------
+def _print(result):
+    keys = [k for k in result if k != "name"]
+    print(f"\n== {result['name']} ==")
+    for k in keys:
+        print(f"  {k:>14}: {result[k]}")
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="GradPath offline benchmarks")
+    p.add_argument("scenario", choices=["graph", "chat", "fast", "kg", "all"])
+    p.add_argument("--requests", type=int, default=32)
+    p.add_argument("--concurrency", type=int, default=8)
+    p.add_argument("--tokens-per-sec", type=float, default=400.0, help="fake model streaming rate")
+    p.add_argument("--first-token-ms", type=float, default=50.0, help="fake model time to first token")
+    p.add_argument("--api-latency-ms", type=float, default=150.0, help="fake YouTube/GitHub latency")
+    p.add_argument("--format", default="text", choices=["text", "ndjson", "sse"])
+    p.add_argument("--url", default=None, help="benchmark an already running server instead")
+    p.add_argument("--json", default=None, help="write results to this file")
+    p.add_argument("--fail-p95-ms", type=float, default=None, help="exit 1 if any p95 exceeds this")
+    args = p.parse_args(argv)
+
+    apis = install_fakes(args.tokens_per_sec, args.first_token_ms / 1000, args.api_latency_ms / 1000)
+    results = []
+    try:
+        if args.scenario in ("graph", "all"):
+            results.append(asyncio.run(bench_graph(args.requests, args.concurrency)))
+        if args.scenario in ("chat", "all"):
+            results.append(asyncio.run(bench_chat(args.requests, args.concurrency, args.url, args.format)))
+        if args.scenario in ("fast", "all"):
+            results.append(asyncio.run(bench_chat(args.requests, args.concurrency, args.url, args.format, fast_path=True)))
+        if args.scenario in ("kg", "all"):
+            results.append(bench_kg(args.requests))
+    finally:
+        apis.stop()
+
+    for r in results:
+        _print(r)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.fail_p95_ms is not None:
+        slow = [r["name"] for r in results if r["p95_ms"] > args.fail_p95_ms or r["errors"]]
+        if slow:
+            print(f"\nFAIL: p95 above {args.fail_p95_ms} ms or errors in: {', '.join(slow)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
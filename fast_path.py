@@ -0,0 +1,142 @@
+# fast_path.py
+# Answer canonical "roadmap for <role>" / "skills for <role>" questions straight from
+# role_mapping.json (+ whatever YouTube/GitHub results are already cached), no LLM call.
+
+import os
+import re
+import asyncio
+import threading
+from typing import Optional
+
+from role_agent import get_catalog
+from resource_agent import (
+    cached_results, youtube_query_for, github_query_for,
+    asearch_youtube_videos, asearch_github_repos,
+)
+
+FAST_PATH_ENABLED = os.getenv("GRADPATH_FAST_PATH", "1").lower() not in {"0", "false", "no", "off"}
+
+# Longer / comparative questions deserve the full agent.
+MAX_QUESTION_WORDS = 20
+
+_ROADMAP_RE = re.compile(r"\b(roadmap|road map|learning path|learning plan|study plan|steps to)\b")
+_BECOME_RE = re.compile(r"\b(how (do i|to|can i) become)\b")
+_SKILLS_RE = re.compile(r"\b(skills?|skillset|need to (know|learn)|what should i learn|requirements?)\b")
+# constraints (time frames, numbers, "without a degree") and hiring questions need the agent too
+_COMPLEX_RE = re.compile(
+    r"\b(compare|comparison|versus|vs\.?|difference|better|or|salary|resume|cv|my |i have|i am|i'm"
+    r"|\d+|days?|weeks?|months?|years?|without|no degree|part[- ]time|hire|hiring|recruit\w*)\b"
+)
+
+SECTION_TITLES = [
+    ("tools", "Tools"),
+    ("cloud_devops", "Cloud & DevOps"),
+    ("soft_skills", "Soft Skills"),
+    ("projects", "Projects"),
+    ("interview_topics", "Interview Topics"),
+]
+
+
+def detect_intent(message: str):
+    """Return (intent, role) for a canonical question, else None."""
+    text = (message or "").strip().lower()
+    if not text or len(text.split()) > MAX_QUESTION_WORDS or _COMPLEX_RE.search(text):
+        return None
+    roles = get_catalog().find_in_text(text)
+    if len(roles) != 1:
+        return None
+    if _ROADMAP_RE.search(text):
+        return "roadmap", roles[0]
+    if _SKILLS_RE.search(text):
+        return "skills", roles[0]
+    if _BECOME_RE.search(text):
+        return "roadmap", roles[0]
+    return None
+
+
+def _week_order(label):
+    m = re.search(r"\d+", label)
+    return int(m.group()) if m else 0
+
+
+def _bullets(items):
+    return "\n".join(f"- {x}" for x in items)
+
+
+_rendered = {}   # (catalog version, role, intent) -> markdown
+_rendered_lock = threading.Lock()
+
+
+def render_role_answer(role: str, intent: str) -> str:
+    """Pre-rendered markdown for a role; memoized until role_mapping.json changes."""
+    catalog = get_catalog()
+    key = (catalog.version, role, intent)
+    cached = _rendered.get(key)
+    if cached is not None:
+        return cached
+
+    info = catalog.data()[role]
+    parts = [f"# {'Roadmap' if intent == 'roadmap' else 'Skills'}: {role}", "## Overview", info.get("overview", "")]
+
+    roadmap = info.get("roadmap") or {}
+    if intent == "roadmap" and roadmap:
+        parts.append("## Roadmap")
+        for week in sorted(roadmap, key=_week_order):
+            parts.append(f"{week}: {', '.join(roadmap[week])}")
+
+    skills = info.get("skills") or {}
+    if skills:
+        parts.append("## Skills")
+        for level, items in skills.items():
+            parts.append(f"**{level.title()}**\n{_bullets(items)}")
+
+    for field, title in SECTION_TITLES:
+        if intent == "skills" and field in {"projects", "interview_topics"}:
+            continue
+        if info.get(field):
+            parts.append(f"## {title}\n{_bullets(info[field])}")
+
+    text = "\n\n".join(parts)
+    with _rendered_lock:
+        if len(_rendered) > 256:
+            _rendered.clear()   # stale versions; the live set is 7 roles x 2 intents
+        _rendered[key] = text
+    return text
+
+
+def _render_resources(role: str) -> str:
+    videos = cached_results("youtube", youtube_query_for(role)) or []
+    repos = cached_results("github", github_query_for(role)) or []
+    parts = []
+    if videos:
+        parts.append("## YouTube Tutorials\n" + "\n".join(f"- [{v['title']}]({v['url']})" for v in videos if v.get("url")))
+    if repos:
+        lines = []
+        for r in repos:
+            if r.get("url"):
+                desc = r.get("description")
+                lines.append(f"- [{r['name']}]({r['url']})" + (f": {desc}" if desc else ""))
+        parts.append("## GitHub Projects\n" + "\n".join(lines))
+    return "\n\n".join(parts)
+
+
+def fast_answer(message: str, enabled: Optional[bool] = None) -> Optional[str]:
+    """Full markdown answer for a canonical question, or None to fall through to the agent."""
+    if not (FAST_PATH_ENABLED if enabled is None else enabled):
+        return None
+    hit = detect_intent(message)
+    if not hit:
+        return None
+    intent, role = hit
+    answer = render_role_answer(role, intent)
+    resources = _render_resources(role)
+    return f"{answer}\n\n{resources}" if resources else answer
+
+
+async def warm_resources():
+    """Fetch YouTube/GitHub results for every role so fast answers include links."""
+    jobs = []
+    for role in get_catalog().roles():
+        jobs.append(asearch_youtube_videos(youtube_query_for(role)))
+        jobs.append(asearch_github_repos(github_query_for(role)))
+    await asyncio.gather(*jobs, return_exceptions=True)
@@ -1,43 +1,186 @@
 import os
-from typing import TypedDict, Annotated, List
+import time
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from functools import partial
+from typing import TypedDict, Annotated, List, Optional
 from dotenv import load_dotenv
 
 from langchain_openai import ChatOpenAI
+from langchain_core.messages import SystemMessage, ToolMessage
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END, add_messages
-from langgraph.prebuilt import ToolNode
 
 # ⬇️ your existing tools
 from tools import get_role_info, get_youtube_resources, get_github_projects
+from metrics import time_node, ToolCall, bind_tool_call
+from history import history_manager
 
 load_dotenv()
 
 # ---- State ----
-class AgentState(TypedDict):
+class AgentState(TypedDict, total=False):
     messages: Annotated[List, add_messages]
+    # per-request budget bookkeeping (reset by the "start" node on every run)
+    tool_rounds: int
+    tokens_used: int
+    started_at: float
+    stop_reason: Optional[str]
+
+# ---- Budget ----
+# Defaults; override per run with config={"configurable": {"max_tool_rounds": 2, ...}}
+AGENT_MAX_TOOL_ROUNDS = int(os.getenv("AGENT_MAX_TOOL_ROUNDS", "3"))
+AGENT_MAX_TOKENS = int(os.getenv("AGENT_MAX_TOKENS", "30000"))
+AGENT_MAX_SECONDS = float(os.getenv("AGENT_MAX_SECONDS", "90"))
 
 # ---- Tools ----
 tools = [get_role_info, get_youtube_resources, get_github_projects]
+tools_by_name = {t.name: t for t in tools}
+
+# Per-tool wall-clock budget; a slow upstream yields an error ToolMessage
+# instead of holding back the results of the other calls in the same turn.
+TOOL_TIMEOUT = float(os.getenv("TOOL_TIMEOUT_SECONDS", "8"))
+TOOL_MAX_WORKERS = int(os.getenv("TOOL_MAX_WORKERS", "8"))
+_tool_pool = ThreadPoolExecutor(max_workers=TOOL_MAX_WORKERS, thread_name_prefix="gradpath-tool")
 
 # ---- LLM (streaming ON) ----
-llm = ChatOpenAI(model="gpt-4o", temperature=0, streaming=True).bind_tools(tools=tools)
+# stream_usage so streamed turns still report token counts for the budget
+chat_model = ChatOpenAI(model="gpt-4o", temperature=0, streaming=True, stream_usage=True)
+llm = chat_model.bind_tools(tools=tools)
+
+def _budget(config) -> dict:
+    conf = (config or {}).get("configurable", {})
+    return {
+        "max_tool_rounds": int(conf.get("max_tool_rounds", AGENT_MAX_TOOL_ROUNDS)),
+        "max_tokens": int(conf.get("max_tokens", AGENT_MAX_TOKENS)),
+        "max_seconds": float(conf.get("max_seconds", AGENT_MAX_SECONDS)),
+    }
+
+def _turn_tokens(msg, messages) -> int:
+    usage = getattr(msg, "usage_metadata", None) or {}
+    if usage.get("total_tokens"):
+        return usage["total_tokens"]
+    # rough estimate (~4 chars/token) when the provider doesn't report usage
+    return (sum(len(str(m.content)) for m in messages) + len(str(msg.content))) // 4
+
+# Appended to the last, tool-less call once a budget is spent
+WRAP_UP_NOTES = {
+    "max_tokens": "The token budget for this request is used up. Answer now from the tool results above; do not call tools.",
+    "max_wall_time": "The time budget for this request is used up. Answer now from the tool results above; do not call tools.",
+}
+
+def _truncated(msg) -> bool:
+    return (getattr(msg, "response_metadata", None) or {}).get("finish_reason") == "length"
+
+def start_node(state: AgentState):
+    return {"tool_rounds": 0, "tokens_used": 0, "started_at": time.time(), "stop_reason": None}
+
+def model_node(state: AgentState, config):
+    budget = _budget(config)
+    tokens_used = state.get("tokens_used", 0)
+    spent = None
+    if tokens_used >= budget["max_tokens"]:
+        spent = "max_tokens"
+    elif time.time() - state.get("started_at", time.time()) >= budget["max_seconds"]:
+        spent = "max_wall_time"
 
-def model_node(state: AgentState):
-    # ask the model with the entire running message list
-    msg = llm.invoke(state["messages"])
-    return {"messages": [msg]}
+    # Out of tool rounds or budget: one last call without tools so the model answers with what it has
+    final = spent is not None or state.get("tool_rounds", 0) >= budget["max_tool_rounds"]
+    runnable = chat_model if final else llm
+
+    # stored state can hold a whole session (checkpointer): send the windowed + summarized view,
+    # with tool payloads of finished turns dropped; the current turn is kept whole
+    prompt = history_manager.prepare(state["messages"])
+    if spent is not None:
+        prompt = prompt + [SystemMessage(content=WRAP_UP_NOTES[spent])]
+    with time_node("model"):
+        msg = runnable.invoke(prompt)
+    update = {"messages": [msg], "tokens_used": tokens_used + _turn_tokens(msg, prompt)}
+    # stop_reason marks answers cut short (budget spent, or the reply hit the length limit);
+    # a complete answer after the last tool round isn't flagged
+    if spent is not None:
+        update["stop_reason"] = spent
+    elif _truncated(msg):
+        update["stop_reason"] = "max_output_tokens"
+    return update
 
 def route_to_tool(state: AgentState):
     last = state["messages"][-1]
     has_calls = getattr(last, "tool_calls", None)
     return "tool" if has_calls else END
 
-tool_node = ToolNode(tools=tools)
+# ---- Tool stage: run the turn's tool calls concurrently ----
+def _tool_error(call, text):
+    return ToolMessage(content=text, tool_call_id=call["id"], name=call["name"], status="error")
+
+def _timed_out(call, outcome):
+    outcome.record(call["name"], TOOL_TIMEOUT, "timeout")
+    return _tool_error(call, f"Tool '{call['name']}' timed out after {TOOL_TIMEOUT:g}s; answer without it.")
+
+def _run_tool(call, config):
+    tool = tools_by_name.get(call["name"])
+    if tool is None:
+        return _tool_error(call, f"Unknown tool '{call['name']}'. Available: {', '.join(tools_by_name)}")
+    try:
+        # invoking with the full tool call returns a ready ToolMessage
+        return tool.invoke({**call, "type": "tool_call"}, config)
+    except Exception as e:
+        return _tool_error(call, f"Tool '{call['name']}' failed: {e}")
+
+def _submit_tool(call, config):
+    # the call's ToolCall rides in its context: a late finish after the timeout isn't recorded
+    outcome = ToolCall()
+    ctx = contextvars.copy_context()
+    ctx.run(bind_tool_call, outcome)
+    return _tool_pool.submit(ctx.run, _run_tool, call, config), outcome
+
+async def _arun_tool(call, config):
+    outcome = ToolCall()
+    bind_tool_call(outcome)   # this coroutine runs as its own task under gather
+    tool = tools_by_name.get(call["name"])
+    if tool is None:
+        return _run_tool(call, config)
+    try:
+        if getattr(tool, "coroutine", None) is not None:
+            job = tool.ainvoke({**call, "type": "tool_call"}, config)
+        else:
+            loop = asyncio.get_running_loop()
+            job = loop.run_in_executor(_tool_pool, partial(contextvars.copy_context().run, _run_tool, call, config))
+        return await asyncio.wait_for(job, TOOL_TIMEOUT)
+    except asyncio.TimeoutError:
+        return _timed_out(call, outcome)
+    except Exception as e:
+        return _tool_error(call, f"Tool '{call['name']}' failed: {e}")
+
+def tool_node_sync(state: AgentState, config):
+    calls = state["messages"][-1].tool_calls
+    with time_node("tool"):
+        submitted = [_submit_tool(call, config) for call in calls]
+        deadline = time.monotonic() + TOOL_TIMEOUT
+        results = []
+        for call, (fut, outcome) in zip(calls, submitted):
+            try:
+                results.append(fut.result(timeout=max(0.0, deadline - time.monotonic())))
+            except FutureTimeout:
+                results.append(_timed_out(call, outcome))
+    return {"messages": results, "tool_rounds": state.get("tool_rounds", 0) + 1}
+
+async def tool_node_async(state: AgentState, config):
+    calls = state["messages"][-1].tool_calls
+    with time_node("tool"):
+        results = await asyncio.gather(*(_arun_tool(call, config) for call in calls))
+    return {"messages": list(results), "tool_rounds": state.get("tool_rounds", 0) + 1}
+
+tool_node = RunnableLambda(tool_node_sync, afunc=tool_node_async, name="tool")
 
 # ---- Graph ----
 graph = StateGraph(AgentState)
+graph.add_node("start", start_node)
 graph.add_node("model", model_node)
 graph.add_node("tool", tool_node)
-graph.set_entry_point("model")
+graph.set_entry_point("start")
+graph.add_edge("start", "model")
 graph.add_conditional_edges("model", route_to_tool)
 graph.add_edge("tool", "model")
 
@@ -0,0 +1,309 @@
+# graph_compact.py
+# Compact in-memory form of the Cytoscape graph payload: interned strings, integer node
+# positions, array-backed edge endpoints and shared style classes, with a lossless round trip
+# to/from the {"nodes": [{"data": {...}}], "edges": [...]} JSON and a columnar wire format
+# (JSON, or msgpack when installed).
+
+import json
+from array import array
+from typing import Any, Dict, List, Optional
+
+try:
+    import msgpack
+except ImportError:   # optional dependency
+    msgpack = None
+
+WIRE_VERSION = 2    # v2: dangling entries carry an absent-key mask; v1 blobs still load
+_ABSENT = object()
+
+
+class StringTable:
+    """Interns repeated strings (labels, section names, colors) to small ints."""
+
+    def __init__(self, strings: Optional[List[str]] = None):
+        self.strings: List[str] = list(strings or [])
+        self._index: Dict[str, int] = {s: i for i, s in enumerate(self.strings)}
+
+    def intern(self, s: str) -> int:
+        i = self._index.get(s)
+        if i is None:
+            i = self._index[s] = len(self.strings)
+            self.strings.append(s)
+        return i
+
+    def __getitem__(self, i: int) -> str:
+        return self.strings[i]
+
+
+class _Columns:
+    """Per-field columns for element `data` dicts. String fields are stored interned;
+    anything else (degree, flags, nested values) as-is. Missing keys stay missing."""
+
+    def __init__(self, strings: StringTable):
+        self.strings = strings
+        self.cols: Dict[str, list] = {}
+        self.kinds: Dict[str, str] = {}   # field -> "s" (interned) | "v" (raw)
+        self.n = 0
+
+    def append(self, data: dict):
+        for key, value in data.items():
+            col = self.cols.get(key)
+            if col is None:
+                col = self.cols[key] = [_ABSENT] * self.n
+                self.kinds[key] = "s"
+            if value is not None and not isinstance(value, str):
+                self.kinds[key] = "v"
+            col.append(value)
+        self.n += 1
+        for key, col in self.cols.items():
+            if len(col) < self.n:
+                col.append(_ABSENT)
+
+    def freeze(self):
+        """Intern string columns once all rows are in (kinds are final by then)."""
+        for key, col in self.cols.items():
+            if self.kinds[key] == "s":
+                self.cols[key] = [v if v is _ABSENT or v is None else self.strings.intern(v) for v in col]
+
+    def row(self, i: int) -> dict:
+        out = {}
+        for key, col in self.cols.items():
+            v = col[i]
+            if v is _ABSENT:
+                continue
+            out[key] = self.strings[v] if self.kinds[key] == "s" and v is not None else v
+        return out
+
+    def to_wire(self) -> dict:
+        wire = {}
+        for key, col in self.cols.items():
+            absent = [i for i, v in enumerate(col) if v is _ABSENT]
+            entry = {"t": self.kinds[key], "values": [None if v is _ABSENT else v for v in col]}
+            if absent:
+                entry["absent"] = absent
+            wire[key] = entry
+        return wire
+
+    @classmethod
+    def from_wire(cls, strings: StringTable, wire: dict, n: int) -> "_Columns":
+        c = cls(strings)
+        c.n = n
+        for key, entry in wire.items():
+            col = list(entry["values"])
+            for i in entry.get("absent", ()):
+                col[i] = _ABSENT
+            c.cols[key] = col
+            c.kinds[key] = entry["t"]
+        return c
+
+
+class CompactGraph:
+    """Columnar graph. Node `i` is addressed by position; edges keep `src`/`dst` as int
+    arrays of node positions (-1 when the endpoint id isn't a node, original id kept aside).
+    Inline `style` dicts are split into a shared style class (everything but the per-element
+    label) referenced by index, plus the interned label; other non-`data` keys are kept as-is."""
+
+    def __init__(self):
+        self.strings = StringTable()
+        self.nodes = _Columns(self.strings)
+        self.edges = _Columns(self.strings)
+        self.src = array("i")
+        self.dst = array("i")
+        self.dangling: Dict[int, tuple] = {}      # edge index -> (source, target) as given, _ABSENT = no key
+        self.style_classes: List[dict] = []
+        self.node_style = array("i")              # index into style_classes, -1 = no style
+        self.edge_style = array("i")
+        self.node_style_label: List[int] = []     # interned style label, -1 = none
+        self.edge_style_label: List[int] = []
+        self.node_other: Dict[int, dict] = {}     # classes / position / … keyed by element index
+        self.edge_other: Dict[int, dict] = {}
+        self.payload_extra: Dict[str, Any] = {}   # top-level keys other than nodes/edges
+
+    # ---- building ----
+    @classmethod
+    def from_cytoscape(cls, payload: dict) -> "CompactGraph":
+        g = cls()
+        class_ids: Dict[tuple, int] = {}
+
+        def split(element: dict, i: int, styles: array, labels: list, other: dict):
+            rest = {k: v for k, v in element.items() if k not in ("data", "style")}
+            if rest:
+                other[i] = rest
+            style = element.get("style")
+            if not isinstance(style, dict):
+                if style is not None:
+                    other.setdefault(i, {})["style"] = style
+                styles.append(-1)
+                labels.append(-1)
+                return
+            label = style.get("label")
+            if "label" in style and not isinstance(label, str):
+                other.setdefault(i, {})["style"] = style
+                styles.append(-1)
+                labels.append(-1)
+                return
+            base = {k: v for k, v in style.items() if k != "label"}
+            key = tuple(base.items())
+            try:
+                k = class_ids.get(key)
+            except TypeError:   # unhashable style values; don't share
+                key, k = None, None
+            if k is None:
+                g.style_classes.append(base)
+                k = len(g.style_classes) - 1
+                if key is not None:
+                    class_ids[key] = k
+            styles.append(k)
+            labels.append(-1 if label is None else g.strings.intern(label))
+
+        pos: Dict[Any, int] = {}
+        for i, n in enumerate(payload.get("nodes", [])):
+            data = n.get("data", {})
+            pos.setdefault(data.get("id"), i)
+            g.nodes.append(data)
+            split(n, i, g.node_style, g.node_style_label, g.node_other)
+        for j, e in enumerate(payload.get("edges", [])):
+            data = dict(e.get("data", {}))
+            s, t = data.pop("source", _ABSENT), data.pop("target", _ABSENT)
+            si = -1 if s is _ABSENT or s is None else pos.get(s, -1)
+            ti = -1 if t is _ABSENT or t is None else pos.get(t, -1)
+            if si < 0 or ti < 0:
+                g.dangling[j] = (s, t)
+            g.src.append(si)
+            g.dst.append(ti)
+            g.edges.append(data)
+            split(e, j, g.edge_style, g.edge_style_label, g.edge_other)
+        g.nodes.freeze()
+        g.edges.freeze()
+        g.payload_extra = {k: v for k, v in payload.items() if k not in ("nodes", "edges")}
+        return g
+
+    @property
+    def node_count(self) -> int:
+        return self.nodes.n
+
+    @property
+    def edge_count(self) -> int:
+        return self.edges.n
+
+    def node_ids(self) -> List[Any]:
+        return [self.nodes.row(i).get("id") for i in range(self.node_count)]
+
+    def degree(self) -> array:
+        deg = array("i", [0]) * self.node_count
+        for s, t in zip(self.src, self.dst):
+            if s >= 0:
+                deg[s] += 1
+            if t >= 0:
+                deg[t] += 1
+        return deg
+
+    # ---- back to Cytoscape JSON ----
+    def _element(self, data: dict, style: int, label: int, other: Optional[dict]) -> dict:
+        el = {"data": data}
+        if other:
+            el.update(other)
+        if style >= 0:
+            el["style"] = dict(self.style_classes[style])
+            if label >= 0:
+                el["style"]["label"] = self.strings[label]
+        return el
+
+    def to_cytoscape(self) -> dict:
+        ids = self.node_ids()
+        nodes = [
+            self._element(self.nodes.row(i), self.node_style[i], self.node_style_label[i], self.node_other.get(i))
+            for i in range(self.node_count)
+        ]
+        edges = []
+        for j in range(self.edge_count):
+            row = self.edges.row(j)
+            if j in self.dangling:
+                s, t = self.dangling[j]
+            else:
+                s, t = ids[self.src[j]], ids[self.dst[j]]
+            data = {}
+            if "id" in row:
+                data["id"] = row.pop("id")
+            if s is not _ABSENT:
+                data["source"] = s
+            if t is not _ABSENT:
+                data["target"] = t
+            data.update(row)
+            edges.append(self._element(data, self.edge_style[j], self.edge_style_label[j], self.edge_other.get(j)))
+        return {"nodes": nodes, "edges": edges, **self.payload_extra}
+
+    # ---- wire format ----
+    def to_wire(self) -> dict:
+        def part(cols, n, styles, labels, other):
+            out = {"n": n, "cols": cols.to_wire()}
+            if any(k >= 0 for k in styles):
+                out["style"], out["style_label"] = list(styles), labels
+            if other:
+                out["other"] = [[i, v] for i, v in sorted(other.items())]
+            return out
+
+        edges = part(self.edges, self.edge_count, self.edge_style, self.edge_style_label, self.edge_other)
+        edges.update(src=list(self.src), dst=list(self.dst))
+        if self.dangling:
+            # [edge, source, target, mask]: mask bit 1/2 = source/target key absent (vs. an explicit null)
+            edges["dangling"] = [
+                [j, None if s is _ABSENT else s, None if t is _ABSENT else t, (s is _ABSENT) | (t is _ABSENT) << 1]
+                for j, (s, t) in sorted(self.dangling.items())
+            ]
+        return {
+            "v": WIRE_VERSION,
+            "strings": self.strings.strings,
+            "style_classes": self.style_classes,
+            "nodes": part(self.nodes, self.node_count, self.node_style, self.node_style_label, self.node_other),
+            "edges": edges,
+            "meta": self.payload_extra,
+        }
+
+    @classmethod
+    def from_wire(cls, wire: dict) -> "CompactGraph":
+        if wire.get("v") not in (1, WIRE_VERSION):
+            raise ValueError(f"Unsupported compact graph version: {wire.get('v')!r}")
+        g = cls()
+        g.strings = StringTable(wire["strings"])
+        g.style_classes = list(wire.get("style_classes", []))
+        g.payload_extra = dict(wire.get("meta", {}))
+        for name in ("nodes", "edges"):
+            part = wire[name]
+            n = part["n"]
+            setattr(g, name, _Columns.from_wire(g.strings, part["cols"], n))
+            setattr(g, f"{name[:-1]}_style", array("i", part.get("style", [-1] * n)))
+            setattr(g, f"{name[:-1]}_style_label", list(part.get("style_label", [-1] * n)))
+            setattr(g, f"{name[:-1]}_other", {i: v for i, v in part.get("other", [])})
+        g.src = array("i", wire["edges"]["src"])
+        g.dst = array("i", wire["edges"]["dst"])
+        g.dangling = {}
+        for j, s, t, *mask in wire["edges"].get("dangling", []):
+            # v1 wrote missing and null endpoints alike as null and read them back as missing
+            mask = mask[0] if mask else (s is None) | (t is None) << 1
+            g.dangling[j] = (_ABSENT if mask & 1 else s, _ABSENT if mask & 2 else t)
+        return g
+
+
+# -----------------------
+# 📦 Convenience
+# -----------------------
+def dumps(payload: dict, fmt: str = "json") -> bytes:
+    """Cytoscape payload -> compact bytes ("json" columnar, or "msgpack")."""
+    wire = CompactGraph.from_cytoscape(payload).to_wire()
+    if fmt == "msgpack":
+        if msgpack is None:
+            raise RuntimeError("msgpack format needs `pip install msgpack`")
+        return msgpack.packb(wire, use_bin_type=True)
+    return json.dumps(wire, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(blob: bytes, fmt: str = "json") -> dict:
+    """Compact bytes -> Cytoscape payload."""
+    if fmt == "msgpack":
+        if msgpack is None:
+            raise RuntimeError("msgpack format needs `pip install msgpack`")
+        wire = msgpack.unpackb(blob, raw=False)
+    else:
+        wire = json.loads(blob)
+    return CompactGraph.from_wire(wire).to_cytoscape()
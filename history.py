@@ -0,0 +1,245 @@
+# history.py
+# Keep per-turn prompt size flat in long chats: drop stale tool payloads, keep a token-counted
+# window of recent turns, fold older turns into a cached rolling summary, and enforce a ceiling.
+
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, List, Optional
+
+from langchain_core.messages import (
+    AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage,
+)
+
+HISTORY_MAX_PROMPT_TOKENS = int(os.getenv("HISTORY_MAX_PROMPT_TOKENS", "8000"))
+HISTORY_WINDOW_TOKENS = int(os.getenv("HISTORY_WINDOW_TOKENS", "3000"))
+HISTORY_SUMMARY_TOKENS = int(os.getenv("HISTORY_SUMMARY_TOKENS", "400"))
+HISTORY_SUMMARIZER = os.getenv("HISTORY_SUMMARIZER", "extractive")   # or "llm"
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("o200k_base")
+except Exception:   # tiktoken missing or encoding not downloadable
+    _ENCODING = None
+
+
+@lru_cache(maxsize=4096)
+def count_text_tokens(text: str) -> int:
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return max(1, len(text) // 4)
+
+
+def count_tokens(messages: List[BaseMessage]) -> int:
+    # ~4 tokens of per-message overhead in the chat format
+    return sum(count_text_tokens(str(m.content)) + 4 for m in messages)
+
+
+def _split_turns(messages: List[BaseMessage]) -> List[List[BaseMessage]]:
+    """Group messages into turns, each starting at a HumanMessage."""
+    turns: List[List[BaseMessage]] = []
+    for m in messages:
+        if isinstance(m, HumanMessage) or not turns:
+            turns.append([m])
+        else:
+            turns[-1].append(m)
+    return turns
+
+
+def drop_tool_payloads(turn: List[BaseMessage]) -> List[BaseMessage]:
+    """Keep only the user text and final assistant text of a finished turn."""
+    kept = []
+    for m in turn:
+        if isinstance(m, ToolMessage):
+            continue
+        if isinstance(m, AIMessage) and m.tool_calls:
+            if not str(m.content).strip():
+                continue
+            m = AIMessage(content=m.content, id=m.id)
+        kept.append(m)
+    return kept
+
+
+def _turn_text(turn: List[BaseMessage]) -> str:
+    return "\n".join(f"{m.type}: {m.content}" for m in turn)
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    if count_text_tokens(text) <= max_tokens:
+        return text
+    if _ENCODING is not None:
+        return _ENCODING.decode(_ENCODING.encode(text, disallowed_special=())[:max_tokens]) + " …"
+    return text[: max_tokens * 4] + " …"
+
+
+# -----------------------
+# 📝 Summarizers
+# -----------------------
+def extractive_summarizer(previous: str, turns: List[List[BaseMessage]], max_tokens: int) -> str:
+    """No-LLM summary: each user question plus the first line of the answer."""
+    lines = [previous] if previous else []
+    for turn in turns:
+        for m in turn:
+            text = str(m.content).strip()
+            if not text:
+                continue
+            first = text.splitlines()[0][:200]
+            who = "User" if isinstance(m, HumanMessage) else "Assistant"
+            lines.append(f"- {who}: {first}")
+    summary = "\n".join(lines)
+    # keep the most recent part if it grows past the budget
+    while count_text_tokens(summary) > max_tokens and len(lines) > 1:
+        lines.pop(0)
+        summary = "\n".join(lines)
+    return _truncate(summary, max_tokens)
+
+
+def llm_summarizer(model: str = "gpt-4o-mini") -> Callable:
+    from langchain_openai import ChatOpenAI
+
+    llm = ChatOpenAI(model=model, temperature=0)
+
+    def summarize(previous: str, turns: List[List[BaseMessage]], max_tokens: int) -> str:
+        convo = "\n\n".join(_turn_text(t) for t in turns)
+        prompt = (
+            "Update the running summary of a career-guidance chat. Keep roles discussed, the user's "
+            f"background and goals, and decisions made. Max {max_tokens} tokens.\n\n"
+            f"Current summary:\n{previous or '(none)'}\n\nNew turns:\n{convo}\n\nUpdated summary:"
+        )
+        return _truncate(str(llm.invoke(prompt).content).strip(), max_tokens)
+
+    return summarize
+
+
+# -----------------------
+# 🧮 Manager
+# -----------------------
+class HistoryManager:
+    """Builds the message list sent to the graph for one turn.
+
+    - finished turns lose their tool calls/results (the answer already used them)
+    - the newest turns are kept verbatim up to `window_tokens`
+    - older turns are folded into a rolling summary; summaries are cached by a hash
+      chain over the turns, so each turn is summarized at most once per session
+    - `max_prompt_tokens` is a hard ceiling: oldest kept turns go first, then the summary
+    """
+
+    def __init__(
+        self,
+        max_prompt_tokens: int = HISTORY_MAX_PROMPT_TOKENS,
+        window_tokens: int = HISTORY_WINDOW_TOKENS,
+        summary_tokens: int = HISTORY_SUMMARY_TOKENS,
+        summarizer: Optional[Callable] = None,
+        cache_size: int = 1024,
+    ):
+        self.max_prompt_tokens = max_prompt_tokens
+        self.window_tokens = window_tokens
+        self.summary_tokens = summary_tokens
+        self.summarizer = summarizer or extractive_summarizer
+        self.cache_size = cache_size
+        self._summaries = OrderedDict()   # chain hash -> summary
+        self._lock = threading.Lock()
+
+    def _chain(self, turns, seed: str = ""):
+        hashes, h = [], hashlib.sha1(seed.encode("utf-8")).digest() if seed else b""
+        for turn in turns:
+            h = hashlib.sha1(h + _turn_text(turn).encode("utf-8")).digest()
+            hashes.append(h)
+        return hashes
+
+    def _summary_for(self, turns: List[List[BaseMessage]], prior: str = "") -> str:
+        if not turns:
+            return prior
+        hashes = self._chain(turns, prior)
+        with self._lock:
+            start, previous = 0, prior
+            for i in range(len(hashes) - 1, -1, -1):   # longest already-summarized prefix
+                if hashes[i] in self._summaries:
+                    start, previous = i + 1, self._summaries[hashes[i]]
+                    self._summaries.move_to_end(hashes[i])
+                    break
+        if start == len(turns):
+            return previous
+        summary = self.summarizer(previous, turns[start:], self.summary_tokens)
+        with self._lock:
+            self._summaries[hashes[-1]] = summary
+            while len(self._summaries) > self.cache_size:
+                self._summaries.popitem(last=False)
+        return summary
+
+    def prepare(self, messages: List[BaseMessage]) -> List[BaseMessage]:
+        system, prior = [], []
+        for m in messages:
+            if isinstance(m, SystemMessage):
+                # an earlier prepare() may already have folded turns into a summary
+                text = str(m.content)
+                if text.startswith(SUMMARY_PREFIX):
+                    prior.append(text[len(SUMMARY_PREFIX):])
+                else:
+                    system.append(m)
+        rest = [m for m in messages if not isinstance(m, SystemMessage)]
+        turns = _split_turns(rest)
+        if not turns:
+            return system
+        current = turns[-1]
+        finished = [drop_tool_payloads(t) for t in turns[:-1]]
+        finished = [t for t in finished if t]
+
+        # newest finished turns that fit the window stay verbatim
+        budget = self.window_tokens - count_tokens(current)
+        keep_from = len(finished)
+        while keep_from > 0:
+            cost = count_tokens(finished[keep_from - 1])
+            if cost > budget:
+                break
+            budget -= cost
+            keep_from -= 1
+        older, recent = finished[:keep_from], finished[keep_from:]
+
+        summary = self._summary_for(older, "\n".join(prior))
+        summary_msgs = [SystemMessage(content=SUMMARY_PREFIX + summary)] if summary else []
+
+        # hard ceiling
+        fixed = count_tokens(system) + count_tokens(current)
+        while recent and fixed + count_tokens(summary_msgs) + sum(count_tokens(t) for t in recent) > self.max_prompt_tokens:
+            recent.pop(0)
+        if summary_msgs and fixed + count_tokens(summary_msgs) > self.max_prompt_tokens:
+            summary_msgs = []
+
+        out = system + summary_msgs
+        for t in recent:
+            out.extend(t)
+        out.extend(current)
+        return out
+
+
+def _default_manager() -> HistoryManager:
+    summarizer = llm_summarizer() if HISTORY_SUMMARIZER == "llm" else None
+    return HistoryManager(summarizer=summarizer)
+
+
+# Shared by app.py and server.py
+history_manager = _default_manager()
+
+
+def messages_from_dicts(items) -> List[BaseMessage]:
+    """[{"role": "user"|"assistant"|"system", "content": "..."}] -> LangChain messages.
+    Items that aren't dicts with string content are skipped."""
+    out = []
+    for item in items or []:
+        if not isinstance(item, dict) or not isinstance(item.get("content", ""), str):
+            continue
+        role, content = item.get("role", "user"), item.get("content", "")
+        if role in ("assistant", "ai"):
+            out.append(AIMessage(content=content))
+        elif role == "system":
+            out.append(SystemMessage(content=content))
+        else:
+            out.append(HumanMessage(content=content))
+    return out
@@ -177,6 +177,14 @@ from pydantic import BaseModel, Field, validator
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
+from result_cache import ResultCache, SqliteStore, MISSING
+from answer_sections import SectionItem, SectionParser, norm, clean_item, is_week_name
+from functools import lru_cache
+import asyncio
+import copy
+import threading
+import httpx
+import hashlib
 import json
 import re
 import uuid
@@ -239,13 +247,49 @@ AllowedEntities:
 
 USER_TEMPLATE = """Text to analyze:
 ---
-{doc}
+{{ doc }}
 ---
-Primary topic (optional): {topic}
+Primary topic (optional): {{ topic }}
 
 Return JSON ONLY.
 """
 
+# Bump when post-processing changes in a way that should invalidate cached graphs;
+# prompt edits are picked up automatically through the hash.
+KG_CACHE_VERSION = 1
+PROMPT_VERSION = hashlib.sha1(
+    (SYSTEM_INSTRUCTIONS + STRICT_SYSTEM_INSTRUCTIONS + USER_TEMPLATE).encode("utf-8")
+).hexdigest()[:12]
+
+# ---------- Result cache ----------
+# Same answer + settings -> same graph: skip the LLM on regenerate / reruns.
+# KG_CACHE_PATH="" keeps the cache in memory only.
+KG_CACHE_PATH = os.getenv("KG_CACHE_PATH", ".cache/kg_graphs.sqlite")
+KG_CACHE_MAX_ENTRIES = int(os.getenv("KG_CACHE_MAX_ENTRIES", "512"))
+
+kg_cache = ResultCache(
+    ttl=int(os.getenv("KG_CACHE_TTL", "0")),   # 0 = no expiry; keys are content hashes
+    max_entries=KG_CACHE_MAX_ENTRIES,
+    max_bytes=int(os.getenv("KG_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+    store=SqliteStore(KG_CACHE_PATH, max_entries=KG_CACHE_MAX_ENTRIES) if KG_CACHE_PATH else None,
+)
+
+def graph_cache_key(doc: str, topic: str, model: str, temperature: float, strict: bool,
+                    auto_label: bool = False, add_degree: bool = True, engine: str = "llm") -> str:
+    raw = json.dumps(
+        [doc or "", topic or "", model, float(temperature), bool(strict), bool(auto_label),
+         bool(add_degree), engine, PROMPT_VERSION, KG_CACHE_VERSION],
+        ensure_ascii=False,
+    )
+    return "kg|" + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def _is_valid_payload(payload: dict) -> bool:
+    try:
+        GraphPayload(**payload)
+    except Exception:
+        return False
+    return True
+
 # ---------- Helpers ----------
 def _short_id(prefix: str) -> str:
     base = re.sub(r"[^a-zA-Z0-9_-]", "", (prefix or "").strip().lower())[:12]
@@ -284,43 +328,118 @@ def annotate_degree(payload: dict) -> dict:
             n["data"]["degree"] = deg.get(nid, 0)
     return payload
 
-def _allowed_from_answer(doc: str) -> list:
-    """Heuristic allowlist of entities (bullets, title-case phrases, Week X-Y)."""
-    allowed = set()
+# ---------- Document index ----------
+# One tokenization of the doc serves the allowlist ranking and the strict in-text check:
+# lookups go through a token -> positions map instead of substring scans of the doc.
+KG_ALLOWLIST_MAX = int(os.getenv("KG_ALLOWLIST_MAX", "150"))
+_TOKEN = re.compile(r"[\w+#]+")
+_WEEK_RANGE = re.compile(r"(?i)week\s*\d+\s*-\s*\d+")
+_CAPITALIZED = re.compile(r"\b([A-Z][A-Za-z0-9+\-]*(?:\s+[A-Z][A-Za-z0-9+\-]*)*)\b")
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN.findall((text or "").lower())
+
+class _DocIndex:
+    """Token positions of the doc, built in one pass. A phrase is looked up by its first
+    token and verified at those positions only, so checks never rescan the document."""
+
+    def __init__(self, doc: str):
+        self.toks = _tokens(doc)
+        self.positions: Dict[str, List[int]] = {}
+        for i, tok in enumerate(self.toks):
+            self.positions.setdefault(tok, []).append(i)
+
+    def _matches(self, phrase: str):
+        want = _tokens(phrase)
+        if not want:
+            return iter(())
+        hits = self.positions.get(want[0], ())
+        if len(want) == 1:
+            return iter(hits)
+        n, toks = len(want), self.toks
+        return (i for i in hits if toks[i:i + n] == want)
+
+    def count(self, phrase: str) -> int:
+        return sum(1 for _ in self._matches(phrase))
+
+    def __contains__(self, phrase: str) -> bool:
+        return next(self._matches(phrase), None) is not None
+
+@lru_cache(maxsize=16)
+def _doc_index(doc: str) -> _DocIndex:
+    return _DocIndex(doc)
+
+# words that never make an entity on their own (sentence starters, pronouns, roadmap filler)
+_GENERIC_WORDS = frozenset("""
+a an the and or but if then so also too this that these those it its you your we our i my me
+they them their he she his her here there what which who how why when where while with without
+for from into onto to of in on at by as is are be been being do does did can could should would
+will may might must just very more most some any all each every other next first finally last
+again now today step steps week weeks month months phase stage note notes tip tips example
+examples overview introduction summary conclusion goal goals focus start learn use build
+practice project projects resources yes no
+""".split())
+
+def _is_generic(x: str) -> bool:
+    toks = _tokens(x)
+    return not toks or all(t in _GENERIC_WORDS or t.isdigit() for t in toks)
+
+def _allowed_from_answer(doc: str, limit: Optional[int] = None) -> list:
+    """Heuristic allowlist of entities (bullets, title-case phrases, Week X-Y). Bullet items
+    and Week ranges rank first, then multi-word phrases, then single words, most frequent
+    first within each; capped at `limit` (default KG_ALLOWLIST_MAX) so the strict prompt stays small."""
+    limit = KG_ALLOWLIST_MAX if limit is None else limit
+    first_seen: Dict[str, int] = {}
+    tier: Dict[str, int] = {}   # 0 bullet / week range, 1 multi-word, 2 single word
+
+    def add(x: str, bullet: bool = False):
+        x = " ".join(x.split())
+        if len(x) < 2 or _is_generic(x):
+            return
+        rank = 0 if bullet else (1 if len(x.split()) > 1 else 2)
+        if x not in first_seen:
+            first_seen[x] = len(first_seen)
+            tier[x] = rank
+        else:
+            tier[x] = min(tier[x], rank)
 
     # bullet-like lines
     for raw in (doc or "").splitlines():
         s = raw.strip()
         if not s:
             continue
-        if s[:1] in "-•*":
+        bullet = s[:1] in "-•*"
+        if bullet:
             s = s.lstrip("-•* \t").strip()
-        if re.match(r"(?i)week\s*\d+\s*-\s*\d+", s):
-            allowed.add(re.sub(r"\s+", " ", s))
-            continue
-        if (len(s.split()) <= 6 and not s.endswith(".")) or s.istitle():
-            allowed.add(re.sub(r"\s+", " ", s))
-
-    # capitalized multi-word terms inside sentences
-    for m in re.findall(r"\b([A-Z][A-Za-z0-9+\-]*(?:\s+[A-Z][A-Za-z0-9+\-]*)*)\b", doc or ""):
-        if 1 <= len(m.split()) <= 4:
-            allowed.add(m.strip())
-
-    allowed = {x for x in allowed if len(x) >= 2}
-    return sorted(allowed)
+        if _WEEK_RANGE.match(s):
+            add(s, bullet=True)
+        elif (len(s.split()) <= 6 and not s.endswith(".")) or s.istitle():
+            add(s, bullet=bullet)
+
+    # capitalized multi-word terms inside sentences, minus sentence starters at either end
+    for m in _CAPITALIZED.findall(doc or ""):
+        for line in m.splitlines():
+            words = line.split()
+            while words and words[0].lower() in _GENERIC_WORDS:
+                words.pop(0)
+            while words and words[-1].lower() in _GENERIC_WORDS:
+                words.pop()
+            if 1 <= len(words) <= 4:
+                add(" ".join(words))
+
+    index = _doc_index(doc or "")
+    ranked = sorted(first_seen, key=lambda x: (tier[x], -index.count(x), first_seen[x]))
+    return ranked[:limit] if limit else ranked
 
 def _enforce_in_text(payload: dict, doc: str) -> dict:
     """Keep only nodes whose name/label occurs in the text; drop dangling edges."""
-    text = (doc or "").lower()
-    def appears(s: str) -> bool:
-        s = (s or "").strip().lower()
-        return bool(s) and s in text
+    index = _doc_index(doc or "")
 
     nodes = []
     keep = set()
     for n in payload.get("nodes", []):
         d = n.get("data", {})
-        if appears(d.get("name")) or appears(d.get("label")):
+        if d.get("name") in index or d.get("label") in index:
             nodes.append(n)
             keep.add(d.get("id"))
 
@@ -330,37 +449,278 @@ def _enforce_in_text(payload: dict, doc: str) -> dict:
     payload["nodes"], payload["edges"] = nodes, edges
     return payload
 
-# ---------- Public API ----------
-def generate_graph_json(
-    doc: str,
-    topic: str = "",
-    model: str = "gpt-4o-mini",
-    temperature: float = 0.0,   # strict extraction likes low creativity
-    auto_label: bool = False,
-    add_degree: bool = True,
-    strict: bool = True,        # guarantees nodes come from the answer
-) -> dict:
-    llm = ChatOpenAI(model=model, temperature=temperature)
-    parser = JsonOutputParser(pydantic_object=GraphPayload)
+# ---------- Local (no-LLM) extractor ----------
+MAX_NODES, MAX_EDGES = 2000, 5000
+_SLUG = re.compile(r"[^a-z0-9]+")
+_MAX_NGRAM = 4
+
+def _split_item(item: SectionItem):
+    """"**Python**: pandas, numpy" -> ("Python", "pandas, numpy")."""
+    text = item.text.replace("**", "").strip()
+    name, _, detail = text.partition(":")
+    if not detail:
+        return item.name, ""
+    return (clean_item(name) or item.name), detail.strip()
+
+class _GraphBuilder:
+    """Accumulates nodes/edges with deterministic ids; nodes are unique by normalized name."""
+
+    def __init__(self):
+        self.nodes: List[dict] = []
+        self.edges: List[dict] = []
+        self.by_name: Dict[str, str] = {}
+        self._ids = set()
+        self._edge_keys = set()
+
+    def _new_id(self, name: str) -> str:
+        base = _SLUG.sub("_", name.lower()).strip("_")[:24] or "node"
+        nid, i = base, 2
+        while nid in self._ids:
+            nid, i = f"{base}_{i}", i + 1
+        self._ids.add(nid)
+        return nid
+
+    def node(self, name: str, label: str, description: Optional[str] = None) -> Optional[str]:
+        key = norm(name)
+        if key in self.by_name:
+            return self.by_name[key]
+        if len(self.nodes) >= MAX_NODES:
+            return None
+        nid = self._new_id(name)
+        self.by_name[key] = nid
+        self.nodes.append({"data": {"id": nid, "label": label, "name": name, "description": description}})
+        return nid
+
+    def edge(self, source: Optional[str], target: Optional[str], label: str):
+        if not source or not target or source == target or len(self.edges) >= MAX_EDGES:
+            return
+        key = (source, target, label)
+        if key in self._edge_keys:
+            return
+        self._edge_keys.add(key)
+        self.edges.append({"data": {"id": f"e{len(self.edges) + 1}", "source": source, "target": target, "label": label}})
+
+    def payload(self) -> dict:
+        return {"nodes": self.nodes, "edges": self.edges}
+
+class LocalGraphBuilder:
+    """Local graph built line by line, so it can follow an answer while it streams.
+
+    Graph shape: topic -> sections -> (levels ->) items, roadmap weeks chained with NEXT,
+    and COVERS edges where an item's text names another item (either order of appearance).
+    `feed()` takes arbitrary chunks (e.g. model token deltas); each completed line is applied
+    at once and `take_delta()` returns what changed since the previous call.
+    """
+
+    def __init__(self, topic: str = ""):
+        self.topic = topic
+        self.parser = SectionParser()
+        self.graph = _GraphBuilder()
+        self._buf = ""
+        self._root: Optional[str] = None
+        self._section_ids: Dict[int, str] = {}       # section index -> node id
+        self._prev_week: Optional[str] = None
+        self._names: Dict[tuple, str] = {}           # node name tokens -> node id
+        self._mentions: Dict[tuple, List[str]] = {}  # n-gram seen in item text -> source ids
+        self._sent = (0, 0)
+
+    def feed(self, text: str) -> "LocalGraphBuilder":
+        self._buf += text or ""
+        if "\n" in self._buf:
+            *lines, self._buf = self._buf.split("\n")
+            for line in lines:
+                self._apply(self.parser.feed_line(line))
+        return self
+
+    def close(self) -> "LocalGraphBuilder":
+        if self._buf:
+            self._apply(self.parser.feed_line(self._buf))
+            self._buf = ""
+        self._ensure_root()   # never empty
+        return self
+
+    def payload(self) -> dict:
+        return {"nodes": list(self.graph.nodes), "edges": list(self.graph.edges)}
+
+    def take_delta(self) -> dict:
+        """Nodes/edges added since the last call. The builder only ever adds today; the
+        removed_* keys are part of the delta format so clients can apply them generically."""
+        n, e = self._sent
+        delta = {"nodes": self.graph.nodes[n:], "edges": self.graph.edges[e:],
+                 "removed_nodes": [], "removed_edges": []}
+        self._sent = (len(self.graph.nodes), len(self.graph.edges))
+        return delta
+
+    def _node(self, name: str, label: str, description: Optional[str] = None) -> Optional[str]:
+        before = len(self.graph.nodes)
+        nid = self.graph.node(name, label, description)
+        if nid and len(self.graph.nodes) > before:
+            toks = tuple(_tokens(name))
+            if 0 < len(toks) <= _MAX_NGRAM:
+                self._names.setdefault(toks, nid)
+                for source in self._mentions.get(toks, ()):
+                    self.graph.edge(source, nid, "COVERS")
+        return nid
+
+    def _link_mentions(self, source: str, detail: str):
+        toks = _tokens(detail)
+        for i in range(len(toks)):
+            for n in range(1, _MAX_NGRAM + 1):
+                if i + n > len(toks):
+                    break
+                gram = tuple(toks[i:i + n])
+                self._mentions.setdefault(gram, []).append(source)
+                target = self._names.get(gram)
+                if target:
+                    self.graph.edge(source, target, "COVERS")
+
+    def _ensure_root(self) -> Optional[str]:
+        if self._root is None:
+            title = self.parser.tree.title
+            self._root = self._node(self.topic or title or "Answer", "TOPIC", title)
+        return self._root
+
+    def _apply(self, event):
+        if not event or event[0] != "item":
+            return
+        item, section = event[1], self.parser.current
+        root = self._ensure_root()
+        index = len(self.parser.tree.sections) - 1
+        sec_id = self._section_ids.get(index)
+        if sec_id is None:
+            # sections without items never get a node
+            sec_id = self._section_ids[index] = self._node(section.title.rstrip(":"), "SECTION", section.tag)
+            self.graph.edge(root, sec_id, "HAS_SECTION")
+
+        name, detail = _split_item(item)
+        parent = sec_id
+        if item.group:
+            parent = self._node(item.group, "LEVEL")
+            self.graph.edge(sec_id, parent, "HAS_LEVEL")
+        is_week = section.tag == "ROADMAP" and is_week_name(name)
+        nid = self._node(name, "MILESTONE" if is_week else (section.tag or "ITEM"), detail or None)
+        self.graph.edge(parent, nid, "INCLUDES")
+        if is_week:
+            self.graph.edge(self._prev_week, nid, "NEXT")
+            self._prev_week = nid
+        if detail and nid:
+            self._link_mentions(nid, detail)
+
+def local_graph_json(doc: str, topic: str = "") -> dict:
+    """Deterministic graph from the answer's structure (see LocalGraphBuilder)."""
+    return LocalGraphBuilder(topic).feed(doc).close().payload()
+
+def _merge_payloads(*payloads: dict) -> dict:
+    """Union of several payloads (local + LLM, or per-chunk subgraphs); nodes match on
+    normalized name, earlier payloads win on label/description, duplicate edges collapse."""
+    b = _GraphBuilder()
+    remap: Dict[tuple, str] = {}
+    for i, source in enumerate(payloads):
+        for n in source.get("nodes", []):
+            d = n.get("data", {})
+            name = d.get("name") or d.get("label") or d.get("id")
+            if not name:
+                continue
+            nid = b.node(name, d.get("label") or "ITEM", d.get("description"))
+            if nid:
+                remap[(i, d.get("id"))] = nid
+    for i, source in enumerate(payloads):
+        for e in source.get("edges", []):
+            d = e.get("data", {})
+            b.edge(remap.get((i, d.get("source"))), remap.get((i, d.get("target"))),
+                   d.get("label") or "RELATED_TO")
+    return b.payload()
+
+# ---------- LLM extractor ----------
+# Long docs are split on headings into chunks of at most KG_CHUNK_CHARS and extracted
+# concurrently (map), then merged by node name (reduce). 0 disables chunking.
+KG_CHUNK_CHARS = int(os.getenv("KG_CHUNK_CHARS", "12000"))
+KG_CHUNK_CONCURRENCY = int(os.getenv("KG_CHUNK_CONCURRENCY", "4"))
+_SECTION_START = re.compile(r"(?m)^(?=#{1,3}\s)")
+
+# oversized text is split on paragraphs, then lines, then whitespace; only a single "word"
+# longer than max_chars is ever sliced
+_CHUNK_SEPARATORS = (re.compile(r"(\n\s*\n)"), re.compile(r"(\n)"), re.compile(r"(\s+)"))
+
+def _split_piece(text: str, max_chars: int, level: int = 0) -> List[str]:
+    if len(text) <= max_chars:
+        return [text]
+    if level == len(_CHUNK_SEPARATORS):
+        return [text[i:i + max_chars] for i in range(0, len(text), max_chars)]
+    pieces: List[str] = []
+    for part in _CHUNK_SEPARATORS[level].split(text):
+        pieces.extend(_split_piece(part, max_chars, level + 1))
+    return pieces
+
+def _split_chunks(doc: str, max_chars: int) -> List[str]:
+    """Pack whole sections into chunks <= max_chars; oversized sections split on paragraphs,
+    then lines, then words."""
+    pieces: List[str] = []
+    for section in _SECTION_START.split(doc or ""):
+        pieces.extend(_split_piece(section, max_chars))
+
+    chunks, current = [], ""
+    for piece in pieces:
+        if current and len(current) + len(piece) > max_chars:
+            chunks.append(current)
+            current = ""
+        current += piece
+    if current.strip():
+        chunks.append(current)
+    return [c for c in chunks if c.strip()]
+
+# ---------- Chain registry ----------
+# One prompt | llm | parser chain per (model, temperature, strict), built on first use and shared
+# by every caller (Streamlit reruns, server threads); all chat models share one pooled HTTP
+# client, so repeat extractions skip client setup and TLS handshakes.
+KG_HTTP_TIMEOUT = float(os.getenv("KG_HTTP_TIMEOUT", "120"))
+KG_HTTP_MAX_CONNECTIONS = int(os.getenv("KG_HTTP_MAX_CONNECTIONS", "16"))
+
+_chains: Dict[tuple, object] = {}
+_chains_lock = threading.Lock()
+_http_client: Optional[httpx.Client] = None
+
+def _shared_http_client() -> httpx.Client:
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.Client(
+            timeout=httpx.Timeout(KG_HTTP_TIMEOUT, connect=10.0),
+            limits=httpx.Limits(max_connections=KG_HTTP_MAX_CONNECTIONS,
+                                max_keepalive_connections=KG_HTTP_MAX_CONNECTIONS),
+        )
+    return _http_client
 
+def _build_chain(model: str, temperature: float, strict: bool):
+    llm = ChatOpenAI(model=model, temperature=temperature, http_client=_shared_http_client())
+    parser = JsonOutputParser(pydantic_object=GraphPayload)
+    prompt = ChatPromptTemplate.from_messages(
+        [("system", STRICT_SYSTEM_INSTRUCTIONS if strict else SYSTEM_INSTRUCTIONS), ("human", USER_TEMPLATE)],
+        template_format="jinja2",
+    )
+    return prompt | llm | parser
+
+def extraction_chain(model: str, temperature: float, strict: bool):
+    key = (model, float(temperature), bool(strict))
+    chain = _chains.get(key)
+    if chain is None:
+        with _chains_lock:
+            chain = _chains.get(key)
+            if chain is None:
+                chain = _chains[key] = _build_chain(model, temperature, strict)
+    return chain
+
+def clear_chains():
+    """Drop registered chains (e.g. after swapping ChatOpenAI for a fake in benchmarks)."""
+    with _chains_lock:
+        _chains.clear()
+
+def _chain_input(doc: str, topic: str, strict: bool) -> dict:
+    inputs = {"doc": doc, "topic": topic or "N/A"}
     if strict:
-        allowed = _allowed_from_answer(doc)
-        prompt = ChatPromptTemplate.from_messages(
-            [("system", STRICT_SYSTEM_INSTRUCTIONS), ("human", USER_TEMPLATE)],
-            template_format="jinja2",
-        )
-        chain = prompt | llm | parser
-        result: Union[GraphPayload, dict, str] = chain.invoke(
-            {"doc": doc, "topic": topic or "N/A", "allowed": json.dumps(allowed)}
-        )
-    else:
-        prompt = ChatPromptTemplate.from_messages(
-            [("system", SYSTEM_INSTRUCTIONS), ("human", USER_TEMPLATE)],
-            template_format="jinja2",
-        )
-        chain = prompt | llm | parser
-        result = chain.invoke({"doc": doc, "topic": topic or "N/A"})
+        inputs["allowed"] = json.dumps(_allowed_from_answer(doc))
+    return inputs
 
+def _payload_from_result(result: Union[GraphPayload, dict, str], doc: str, strict: bool) -> dict:
     if isinstance(result, GraphPayload):
         payload = result.dict()
     elif isinstance(result, dict):
@@ -374,10 +734,217 @@ def generate_graph_json(
     payload = _dedupe_and_enforce_ids(payload)
     if strict:
         payload = _enforce_in_text(payload, doc)
+    return payload
+
+def _chunks_for(doc: str, chunk_chars: int) -> List[str]:
+    return _split_chunks(doc, chunk_chars) if chunk_chars and len(doc or "") > chunk_chars else [doc]
+
+def _reduce_chunks(chunks: List[str], results: list, strict: bool) -> dict:
+    # map: each chunk gets its own (smaller) allowlist; one failed chunk doesn't sink the graph
+    parts, errors = [], []
+    for chunk, result in zip(chunks, results):
+        if isinstance(result, Exception):
+            errors.append(result)
+            continue
+        try:
+            parts.append(_payload_from_result(result, chunk, strict))
+        except Exception as e:
+            errors.append(e)
+    if not parts:
+        raise errors[0]
+    if errors:
+        print(f"KG extraction: {len(errors)}/{len(chunks)} chunks failed:", errors[0])
+    # reduce
+    return _dedupe_and_enforce_ids(_merge_payloads(*parts))
+
+def _chain_inputs(doc: str, topic: str, strict: bool, chunk_chars: int):
+    """-> (chunks, one chain input per chunk); the strict allowlists make this CPU-bound."""
+    chunks = _chunks_for(doc, chunk_chars)
+    return chunks, [_chain_input(chunk, topic, strict) for chunk in chunks]
+
+def _llm_graph_json(doc: str, topic: str, model: str, temperature: float, strict: bool,
+                    chunk_chars: int = 0) -> dict:
+    chain = extraction_chain(model, temperature, strict)
+    chunks, inputs = _chain_inputs(doc, topic, strict, chunk_chars)
+    if len(chunks) == 1:
+        return _payload_from_result(chain.invoke(inputs[0]), doc, strict)
+    results = chain.batch(inputs, config={"max_concurrency": KG_CHUNK_CONCURRENCY}, return_exceptions=True)
+    return _reduce_chunks(chunks, results, strict)
+
+async def _allm_graph_json(doc: str, topic: str, model: str, temperature: float, strict: bool,
+                           chunk_chars: int = 0) -> dict:
+    # allowlists and in-text filtering run in threads; only the LLM calls are awaited on the loop
+    chain = extraction_chain(model, temperature, strict)
+    chunks, inputs = await asyncio.to_thread(_chain_inputs, doc, topic, strict, chunk_chars)
+    if len(chunks) == 1:
+        result = await chain.ainvoke(inputs[0])
+        return await asyncio.to_thread(_payload_from_result, result, doc, strict)
+    results = await chain.abatch(inputs, config={"max_concurrency": KG_CHUNK_CONCURRENCY}, return_exceptions=True)
+    return await asyncio.to_thread(_reduce_chunks, chunks, results, strict)
+
+# ---------- Public API ----------
+ENGINES = ("llm", "local", "hybrid")
+
+def _check_engine(engine: str):
+    if engine not in ENGINES:
+        raise ValueError(f"engine must be one of {ENGINES}, got {engine!r}")
+
+def _local_payload(doc: str, topic: str, add_degree: bool) -> dict:
+    # deterministic and cheap next to an LLM call (milliseconds on long docs), so it isn't cached
+    payload = local_graph_json(doc, topic)
+    return annotate_degree(payload) if add_degree else payload
+
+def _cache_key(doc, topic, model, temperature, strict, auto_label, add_degree, engine, chunk_chars) -> str:
+    chunked = bool(chunk_chars) and len(doc or "") > chunk_chars
+    return graph_cache_key(doc, topic, model, temperature, strict, auto_label, add_degree,
+                           f"{engine}/chunks:{chunk_chars}" if chunked else engine)
+
+def _cached(key: str, use_cache: bool) -> Optional[dict]:
+    if use_cache:
+        hit = kg_cache.get(key)
+        if hit is not MISSING:
+            return copy.deepcopy(hit)   # callers annotate/style the payload in place
+    return None
+
+def _finish(payload: dict, key: str, add_degree: bool, use_cache: bool) -> dict:
     if add_degree:
         payload = annotate_degree(payload)
+    # only validated, non-empty graphs are cached so fallbacks still get their turn
+    if use_cache and _is_valid_payload(payload):
+        kg_cache.set(key, copy.deepcopy(payload))
     return payload
 
+def generate_graph_json(
+    doc: str,
+    topic: str = "",
+    model: str = "gpt-4o-mini",
+    temperature: float = 0.0,   # strict extraction likes low creativity
+    auto_label: bool = False,
+    add_degree: bool = True,
+    strict: bool = True,        # guarantees nodes come from the answer
+    use_cache: bool = True,
+    engine: str = "llm",        # "local": no LLM; "hybrid": local first pass + LLM enrichment
+    chunk_chars: Optional[int] = None,   # map-reduce docs longer than this (default KG_CHUNK_CHARS, 0 = off)
+) -> dict:
+    _check_engine(engine)
+    if engine == "local":
+        return _local_payload(doc, topic, add_degree)
+
+    chunk_chars = KG_CHUNK_CHARS if chunk_chars is None else chunk_chars
+    key = _cache_key(doc, topic, model, temperature, strict, auto_label, add_degree, engine, chunk_chars)
+    hit = _cached(key, use_cache)
+    if hit is not None:
+        return hit
+
+    if engine == "hybrid":
+        payload = local_graph_json(doc, topic)
+        try:
+            payload = _merge_payloads(payload, _llm_graph_json(doc, topic, model, temperature, strict, chunk_chars))
+        except Exception as e:   # enrichment is best-effort; the local graph stands on its own
+            print("KG enrichment failed, using local graph:", e)
+    else:
+        payload = _llm_graph_json(doc, topic, model, temperature, strict, chunk_chars)
+    return _finish(payload, key, add_degree, use_cache)
+
+async def agenerate_graph_json(
+    doc: str,
+    topic: str = "",
+    model: str = "gpt-4o-mini",
+    temperature: float = 0.0,
+    auto_label: bool = False,
+    add_degree: bool = True,
+    strict: bool = True,
+    use_cache: bool = True,
+    engine: str = "llm",
+    chunk_chars: Optional[int] = None,
+    race: bool = False,         # strict and lenient at once, see arace_graph_json
+    deadline: Optional[float] = None,
+) -> dict:
+    """Async generate_graph_json: same arguments, same cache."""
+    if race:
+        payload, _ = await arace_graph_json(doc, topic, model, temperature, add_degree=add_degree,
+                                            use_cache=use_cache, engine=engine, chunk_chars=chunk_chars,
+                                            deadline=deadline)
+        return payload
+    _check_engine(engine)
+    # local extraction and the sqlite cache are blocking; keep them off the event loop
+    if engine == "local":
+        return await asyncio.to_thread(_local_payload, doc, topic, add_degree)
+
+    chunk_chars = KG_CHUNK_CHARS if chunk_chars is None else chunk_chars
+    key = _cache_key(doc, topic, model, temperature, strict, auto_label, add_degree, engine, chunk_chars)
+    hit = await asyncio.to_thread(_cached, key, use_cache)
+    if hit is not None:
+        return hit
+
+    if engine == "hybrid":
+        payload = await asyncio.to_thread(local_graph_json, doc, topic)
+        try:
+            enriched = await _allm_graph_json(doc, topic, model, temperature, strict, chunk_chars)
+            payload = await asyncio.to_thread(_merge_payloads, payload, enriched)
+        except Exception as e:
+            print("KG enrichment failed, using local graph:", e)
+    else:
+        payload = await _allm_graph_json(doc, topic, model, temperature, strict, chunk_chars)
+    return await asyncio.to_thread(_finish, payload, key, add_degree, use_cache)
+
+# ---------- Race mode ----------
+# Strict and lenient extraction start together. Strict wins if it returns a non-empty graph
+# within `deadline` seconds; otherwise the lenient result is used once ready. The losing request
+# is cancelled, so the worst case is about one LLM round trip instead of two back to back.
+KG_RACE_DEADLINE = float(os.getenv("KG_RACE_DEADLINE", "15"))
+
+def _has_nodes(task: "asyncio.Future") -> bool:
+    return (task.done() and not task.cancelled() and task.exception() is None
+            and bool((task.result() or {}).get("nodes")))
+
+async def _cancel(task: "asyncio.Future"):
+    if not task.done():
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+async def arace_graph_json(
+    doc: str,
+    topic: str = "",
+    model: str = "gpt-4o-mini",
+    temperature: float = 0.0,
+    lenient_temperature: float = 0.2,
+    add_degree: bool = True,
+    use_cache: bool = True,
+    engine: str = "llm",
+    chunk_chars: Optional[int] = None,
+    deadline: Optional[float] = None,
+    local_fallback: bool = True,
+):
+    """Returns (payload, mode), mode being "strict" | "lenient" | "local fallback"
+    ("local" for engine="local"). With local_fallback=False a lost race returns (None, None)."""
+    _check_engine(engine)
+    if engine == "local":
+        return await asyncio.to_thread(_local_payload, doc, topic, add_degree), "local"
+    deadline = KG_RACE_DEADLINE if deadline is None else deadline
+    common = dict(doc=doc, topic=topic, model=model, add_degree=add_degree,
+                  use_cache=use_cache, engine=engine, chunk_chars=chunk_chars)
+    strict = asyncio.ensure_future(agenerate_graph_json(temperature=temperature, strict=True, **common))
+    lenient = asyncio.ensure_future(agenerate_graph_json(
+        temperature=lenient_temperature, auto_label=True, strict=False, **common))
+    try:
+        await asyncio.wait([strict], timeout=deadline)
+        if _has_nodes(strict):
+            return strict.result(), "strict"
+        await _cancel(strict)
+        await asyncio.wait([lenient])
+        if _has_nodes(lenient):
+            return lenient.result(), "lenient"
+        for task in (strict, lenient):
+            if not task.cancelled() and task.exception() is not None:
+                print("KG race attempt failed:", task.exception())
+    finally:
+        await _cancel(strict)
+        await _cancel(lenient)
+    if not local_fallback:
+        return None, None
+    return await asyncio.to_thread(_local_payload, doc, topic, add_degree), "local fallback"
+
 def save_graph_json(payload: dict, path: str) -> str:
     os.makedirs(os.path.dirname(path), exist_ok=True)
     with open(path, "w", encoding="utf-8") as f:
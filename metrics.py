@@ -0,0 +1,299 @@
+# metrics.py
+# Minimal in-process metrics (Prometheus text format) + per-request traces for the agent pipeline.
+
+import time
+import uuid
+import bisect
+import asyncio
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+ITERATION_BUCKETS = (1, 2, 3, 4, 5, 6, 8, 10, 15, 25)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels_text(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name, self.help, self.labels = name, help_text, tuple(labels)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, v in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels_text(self.labels, key)} {v:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labels = name, help_text, tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple, list] = {}   # key -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            if i < len(self.buckets):
+                s[i] += 1
+            s[-2] += value
+            s[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, s in sorted(self._series.items()):
+                running = 0
+                for le, c in zip(self.buckets, s):
+                    running += c
+                    lines.append(f"{self.name}_bucket{_labels_text(self.labels + ('le',), key + (f'{le:g}',))} {running}")
+                lines.append(f"{self.name}_bucket{_labels_text(self.labels + ('le',), key + ('+Inf',))} {s[-1]}")
+                lines.append(f"{self.name}_sum{_labels_text(self.labels, key)} {s[-2]:.6f}")
+                lines.append(f"{self.name}_count{_labels_text(self.labels, key)} {s[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def counter(self, *args, **kwargs) -> Counter:
+        m = Counter(*args, **kwargs)
+        self._metrics.append(m)
+        return m
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        m = Histogram(*args, **kwargs)
+        self._metrics.append(m)
+        return m
+
+    def add_collector(self, fn: Callable[[], List[str]]):
+        """Register a callback that renders extra lines at scrape time (e.g. cache stats)."""
+        self._collectors.append(fn)
+
+    def render(self) -> str:
+        lines = []
+        for m in self._metrics:
+            lines.extend(m.render())
+        for fn in self._collectors:
+            try:
+                lines.extend(fn())
+            except Exception:
+                pass
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUESTS = registry.counter("gradpath_requests_total", "Chat requests by route.", ["route"])
+REQUEST_SECONDS = registry.histogram("gradpath_request_seconds", "End-to-end /chat stream duration.", ["route"])
+TTFT_SECONDS = registry.histogram("gradpath_ttft_seconds", "Time to first streamed token.", ["route"])
+NODE_SECONDS = registry.histogram("gradpath_node_seconds", "Wall time per graph node execution.", ["node"])
+TOOL_SECONDS = registry.histogram("gradpath_tool_seconds", "Wall time per tool call.", ["tool", "status"])
+LOOP_ITERATIONS = registry.histogram("gradpath_loop_iterations", "Model turns per agent run.", buckets=ITERATION_BUCKETS)
+
+
+_caches: Dict[str, Callable[[], dict]] = {}
+
+
+def register_cache(name: str, stats_fn: Callable[[], dict]):
+    """Expose a cache's stats() dict (hits/misses/entries/...) as gradpath_cache_<key>{cache=name}."""
+    _caches[name] = stats_fn
+
+
+def _collect_caches() -> List[str]:
+    families: Dict[str, List[str]] = {}
+    for name, stats_fn in sorted(_caches.items()):
+        for key, value in stats_fn().items():
+            metric = f"gradpath_cache_{key}"
+            families.setdefault(metric, []).append(f'{metric}{{cache="{_escape(name)}"}} {value}')
+    lines = []
+    for metric, samples in families.items():
+        lines.append(f"# TYPE {metric} gauge")
+        lines.extend(samples)
+    return lines
+
+
+registry.add_collector(_collect_caches)
+
+
+# -----------------------------------------------------------------------------
+# Per-request trace
+# -----------------------------------------------------------------------------
+class RequestTrace:
+    """Timeline of one /chat request; shared by reference across graph threads."""
+
+    def __init__(self, route: str = "agent", request_id: Optional[str] = None):
+        self.request_id = request_id or uuid.uuid4().hex[:16]
+        self.route = route
+        self.started = time.perf_counter()
+        self.ttft: Optional[float] = None
+        self.model_turns: List[float] = []
+        self.tools: List[dict] = []
+        self._lock = threading.Lock()
+
+    def first_token(self):
+        if self.ttft is None:
+            self.ttft = time.perf_counter() - self.started
+
+    def add_model_turn(self, seconds: float):
+        with self._lock:
+            self.model_turns.append(seconds)
+
+    def add_tool(self, name: str, seconds: float, status: str):
+        with self._lock:
+            self.tools.append({"tool": name, "ms": round(seconds * 1000, 2), "status": status})
+
+    def to_dict(self) -> dict:
+        total = time.perf_counter() - self.started
+        model = sum(self.model_turns)
+        return {
+            "request_id": self.request_id,
+            "route": self.route,
+            "total_ms": round(total * 1000, 2),
+            "ttft_ms": round(self.ttft * 1000, 2) if self.ttft is not None else None,
+            "iterations": len(self.model_turns),
+            "model_ms": [round(s * 1000, 2) for s in self.model_turns],
+            "model_total_ms": round(model * 1000, 2),
+            "tools": list(self.tools),
+        }
+
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("gradpath_trace", default=None)
+
+
+def start_trace(route: str = "agent", request_id: Optional[str] = None) -> RequestTrace:
+    trace = RequestTrace(route, request_id)
+    _current_trace.set(trace)
+    return trace
+
+
+def bind_trace(trace: RequestTrace):
+    """Make `trace` current in this task/context (and in tasks/threads spawned from it)."""
+    _current_trace.set(trace)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+
+def finish_trace(trace: RequestTrace):
+    """Record request-level metrics once the stream is done."""
+    REQUESTS.inc(route=trace.route)
+    REQUEST_SECONDS.observe(time.perf_counter() - trace.started, route=trace.route)
+    if trace.ttft is not None:
+        TTFT_SECONDS.observe(trace.ttft, route=trace.route)
+    if trace.route == "agent":
+        LOOP_ITERATIONS.observe(len(trace.model_turns))
+
+
+@contextmanager
+def time_node(node: str):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - t0
+        NODE_SECONDS.observe(elapsed, node=node)
+        trace = current_trace()
+        if trace is not None and node == "model":
+            trace.add_model_turn(elapsed)
+
+
+def record_tool(name: str, seconds: float, status: str = "ok"):
+    TOOL_SECONDS.observe(seconds, tool=name, status=status)
+    trace = current_trace()
+    if trace is not None:
+        trace.add_tool(name, seconds, status)
+
+
+def _tool_status(result) -> str:
+    first = result[0] if isinstance(result, list) and result else result
+    return "error" if isinstance(first, dict) and "error" in first else "ok"
+
+
+_current_tool_call: contextvars.ContextVar = contextvars.ContextVar("gradpath_tool_call", default=None)
+
+
+class ToolCall:
+    """One tool invocation; only its first outcome is recorded, so a sync tool still running in
+    the pool after its timeout was recorded doesn't also report a late "ok"."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.recorded = False
+
+    def record(self, name: str, seconds: float, status: str = "ok"):
+        with self._lock:
+            if self.recorded:
+                return
+            self.recorded = True
+        record_tool(name, seconds, status)
+
+
+def bind_tool_call(call: ToolCall):
+    """Make `call` current so timed_tool records through it (threads/tasks spawned inherit it)."""
+    _current_tool_call.set(call)
+
+
+def _record_tool_once(name: str, seconds: float, status: str):
+    call = _current_tool_call.get()
+    if call is None:
+        record_tool(name, seconds, status)
+    else:
+        call.record(name, seconds, status)
+
+
+def timed_tool(name: str):
+    """Decorator recording wall time + ok/error status for a tool function (sync or async)."""
+    def wrap(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                t0 = time.perf_counter()
+                result = await fn(*args, **kwargs)
+                _record_tool_once(name, time.perf_counter() - t0, _tool_status(result))
+                return result
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            result = fn(*args, **kwargs)
+            _record_tool_once(name, time.perf_counter() - t0, _tool_status(result))
+            return result
+        return wrapper
+    return wrap
@@ -1,19 +1,217 @@
 import os
-import requests
+import time
+import random
+import asyncio
+import threading
+import weakref
+from concurrent.futures import Future
+from urllib.parse import urlsplit
+
+import httpx
 from dotenv import load_dotenv
 
+from result_cache import ResultCache, SqliteStore, MISSING, make_key
+
 load_dotenv()
 
 # --- API Keys ---
 YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 
+# --- Endpoints (overridable for local stand-ins) ---
+YOUTUBE_SEARCH_URL = os.getenv("YOUTUBE_SEARCH_URL", "https://www.googleapis.com/youtube/v3/search")
+GITHUB_SEARCH_URL = os.getenv("GITHUB_SEARCH_URL", "https://api.github.com/search/repositories")
+
+# --- Result cache ---
+# Queries are built from a handful of role names, so most calls are repeats.
+# Set RESOURCE_CACHE_PATH to keep results across restarts (sqlite file).
+RESOURCE_CACHE_TTL = int(os.getenv("RESOURCE_CACHE_TTL", "21600"))  # 6h
+RESOURCE_CACHE_PATH = os.getenv("RESOURCE_CACHE_PATH", "")
+
+resource_cache = ResultCache(
+    ttl=RESOURCE_CACHE_TTL,
+    max_entries=int(os.getenv("RESOURCE_CACHE_MAX_ENTRIES", "1024")),
+    max_bytes=int(os.getenv("RESOURCE_CACHE_MAX_BYTES", str(8 * 1024 * 1024))),
+    store=SqliteStore(RESOURCE_CACHE_PATH) if RESOURCE_CACHE_PATH else None,
+)
+
+# --- HTTP client settings ---
+HTTP_TIMEOUT = httpx.Timeout(
+    float(os.getenv("HTTP_READ_TIMEOUT", "10")),
+    connect=float(os.getenv("HTTP_CONNECT_TIMEOUT", "3")),
+)
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+HTTP_MAX_PER_HOST = int(os.getenv("HTTP_MAX_PER_HOST", "8"))
+HTTP_LIMITS = httpx.Limits(max_connections=4 * HTTP_MAX_PER_HOST, max_keepalive_connections=HTTP_MAX_PER_HOST)
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# -----------------------
+# 🌐 Shared HTTP clients
+# -----------------------
+_sync_client = None
+_sync_lock = threading.Lock()
+_host_slots = {}   # host -> threading.BoundedSemaphore (sync path)
+
+# httpx.AsyncClient and asyncio.Semaphore are bound to the loop that first uses them.
+# Streamlit spins up a loop per message, so keep one pool per live loop.
+_async_pools = weakref.WeakKeyDictionary()   # loop -> (AsyncClient, {host: Semaphore})
+
+
+def get_http_client() -> httpx.Client:
+    global _sync_client
+    if _sync_client is None:
+        with _sync_lock:
+            if _sync_client is None:
+                _sync_client = httpx.Client(timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS)
+    return _sync_client
+
+
+def _async_pool():
+    loop = asyncio.get_running_loop()
+    pool = _async_pools.get(loop)
+    if pool is None:
+        pool = (httpx.AsyncClient(timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS), {})
+        _async_pools[loop] = pool
+    return pool
+
+
+async def aclose_http_clients():
+    """Close the running loop's pooled AsyncClient and the shared sync client (app shutdown)."""
+    global _sync_client
+    pool = _async_pools.pop(asyncio.get_running_loop(), None)
+    if pool is not None:
+        await pool[0].aclose()
+    with _sync_lock:
+        client, _sync_client = _sync_client, None
+    if client is not None:
+        client.close()
+
+
+def _sync_slot(host):
+    with _sync_lock:
+        return _host_slots.setdefault(host, threading.BoundedSemaphore(HTTP_MAX_PER_HOST))
+
+
+def _backoff(attempt, response=None):
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), 30.0)
+    return HTTP_BACKOFF_BASE * (2 ** attempt) * (0.5 + random.random() / 2)
+
+
+def _http_get(url, params=None, headers=None):
+    """GET with keep-alive pooling, per-host concurrency cap and backoff on 429/5xx.
+    The host slot is held per attempt only, so backoff sleeps don't block other callers."""
+    client = get_http_client()
+    slot = _sync_slot(urlsplit(url).netloc)
+    for attempt in range(HTTP_MAX_RETRIES + 1):
+        try:
+            with slot:
+                response = client.get(url, params=params, headers=headers)
+        except httpx.TransportError:
+            if attempt == HTTP_MAX_RETRIES:
+                raise
+            time.sleep(_backoff(attempt))
+            continue
+        if response.status_code not in RETRY_STATUS or attempt == HTTP_MAX_RETRIES:
+            return response
+        time.sleep(_backoff(attempt, response))
+
+
+async def _ahttp_get(url, params=None, headers=None):
+    client, slots = _async_pool()
+    host = urlsplit(url).netloc
+    slot = slots.get(host)
+    if slot is None:
+        slot = slots[host] = asyncio.Semaphore(HTTP_MAX_PER_HOST)
+    for attempt in range(HTTP_MAX_RETRIES + 1):
+        try:
+            async with slot:
+                response = await client.get(url, params=params, headers=headers)
+        except httpx.TransportError:
+            if attempt == HTTP_MAX_RETRIES:
+                raise
+            await asyncio.sleep(_backoff(attempt))
+            continue
+        if response.status_code not in RETRY_STATUS or attempt == HTTP_MAX_RETRIES:
+            return response
+        await asyncio.sleep(_backoff(attempt, response))
+
+
+def _error_body(response):
+    try:
+        return response.json()
+    except ValueError:
+        return response.text[:500]
+
+
+def _cache_lookup(endpoint, query, max_results):
+    key = make_key(endpoint, query, max_results)
+    return key, resource_cache.get(key)
+
+
+def cached_results(endpoint, query, max_results=5):
+    """Peek at the cache without touching the network; None on a miss.
+    Not counted in the cache's hit/miss stats (fast answers peek on every request)."""
+    hit = resource_cache.peek(make_key(endpoint, query, max_results))
+    return None if hit is MISSING else hit
+
+
+def youtube_query_for(role):
+    return f"{role} roadmap tutorial"
+
+
+def github_query_for(role):
+    return f"{role} machine learning projects"
+
+
+def _cache_store(key, results):
+    if results:  # don't pin API errors / empty pages
+        resource_cache.set(key, results)
+    return results
+
+
+# Concurrent misses for the same key (e.g. a /chat/batch of similar questions) share one
+# upstream call instead of each hitting the API before the first result lands in the cache.
+_inflight = {}                              # key -> concurrent.futures.Future (sync path)
+_ainflight = weakref.WeakKeyDictionary()    # loop -> {key: Task}
+
+
+def _single_flight(key, fetch):
+    with _sync_lock:
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = _inflight[key] = Future()
+    if not owner:
+        return future.result()
+    try:
+        future.set_result(fetch())
+    except BaseException as e:
+        future.set_exception(e)
+    finally:
+        with _sync_lock:
+            _inflight.pop(key, None)
+    return future.result()
+
+
+async def _asingle_flight(key, fetch):
+    loop = asyncio.get_running_loop()
+    tasks = _ainflight.setdefault(loop, {})
+    task = tasks.get(key)
+    if task is None:
+        task = tasks[key] = loop.create_task(fetch())
+        task.add_done_callback(lambda _: tasks.pop(key, None))
+    # shield: one caller cancelling must not cancel the fetch the others wait on
+    return await asyncio.shield(task)
+
 # -----------------------
 # 🔴 YouTube Search Agent
 # -----------------------
-def search_youtube_videos(query, max_results=5):
-    url = "https://www.googleapis.com/youtube/v3/search"
-    params = {
+def _youtube_params(query, max_results):
+    return {
         "part": "snippet",
         "q": query,
         "type": "video",
@@ -21,9 +219,9 @@ def search_youtube_videos(query, max_results=5):
         "key": YOUTUBE_API_KEY
     }
 
-    response = requests.get(url, params=params)
+def _parse_youtube(response):
     if response.status_code != 200:
-        print("YouTube API Error:", response.json())
+        print("YouTube API Error:", _error_body(response))
         return []
 
     data = response.json()
@@ -37,24 +235,44 @@ def search_youtube_videos(query, max_results=5):
 
     return results
 
+def search_youtube_videos(query, max_results=5):
+    key, hit = _cache_lookup("youtube", query, max_results)
+    if hit is not MISSING:
+        return hit
+
+    def fetch():
+        response = _http_get(YOUTUBE_SEARCH_URL, params=_youtube_params(query, max_results))
+        return _cache_store(key, _parse_youtube(response))
+    return _single_flight(key, fetch)
+
+async def asearch_youtube_videos(query, max_results=5):
+    key, hit = _cache_lookup("youtube", query, max_results)
+    if hit is not MISSING:
+        return hit
+
+    async def fetch():
+        response = await _ahttp_get(YOUTUBE_SEARCH_URL, params=_youtube_params(query, max_results))
+        return _cache_store(key, _parse_youtube(response))
+    return await _asingle_flight(key, fetch)
+
 # -----------------------
 # 🟣 GitHub Search Agent
 # -----------------------
-def search_github_repos(query, max_results=5):
-    url = "https://api.github.com/search/repositories"
+def _github_request(query, max_results):
     headers = {
         "Authorization": f"Bearer {GITHUB_TOKEN}"
-    }
+    } if GITHUB_TOKEN else {}
     params = {
         "q": query,
         "sort": "stars",
         "order": "desc",
         "per_page": max_results
     }
+    return params, headers
 
-    response = requests.get(url, headers=headers, params=params)
+def _parse_github(response):
     if response.status_code != 200:
-        print("GitHub API Error:", response.json())
+        print("GitHub API Error:", _error_body(response))
         return []
 
     data = response.json()
@@ -68,3 +286,25 @@ def search_github_repos(query, max_results=5):
         })
 
     return results
+
+def search_github_repos(query, max_results=5):
+    key, hit = _cache_lookup("github", query, max_results)
+    if hit is not MISSING:
+        return hit
+    params, headers = _github_request(query, max_results)
+
+    def fetch():
+        response = _http_get(GITHUB_SEARCH_URL, params=params, headers=headers)
+        return _cache_store(key, _parse_github(response))
+    return _single_flight(key, fetch)
+
+async def asearch_github_repos(query, max_results=5):
+    key, hit = _cache_lookup("github", query, max_results)
+    if hit is not MISSING:
+        return hit
+    params, headers = _github_request(query, max_results)
+
+    async def fetch():
+        response = await _ahttp_get(GITHUB_SEARCH_URL, params=params, headers=headers)
+        return _cache_store(key, _parse_github(response))
+    return await _asingle_flight(key, fetch)
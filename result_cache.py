@@ -0,0 +1,193 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Sentinel so callers can cache falsy values and still tell a miss apart.
+MISSING = object()
+
+
+def normalize_query(query: str) -> str:
+    return re.sub(r"\s+", " ", (query or "").strip().lower())
+
+
+def make_key(endpoint: str, query: str, max_results=None) -> str:
+    """Cache key for an upstream search: (endpoint, normalized query, max_results)."""
+    return f"{endpoint}|{normalize_query(query)}|{max_results}"
+
+
+def _sizeof(value) -> int:
+    try:
+        return len(json.dumps(value, ensure_ascii=False, default=str))
+    except (TypeError, ValueError):
+        return len(repr(value))
+
+
+# -----------------------
+# 💾 On-disk store
+# -----------------------
+class SqliteStore:
+    """Tiny key -> JSON value table so cached results survive restarts."""
+
+    def __init__(self, path: str, max_entries: int = 10000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " expires_at REAL, accessed_at REAL NOT NULL)"
+            )
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return MISSING, None
+            value, expires_at = row
+            with self._conn:
+                if expires_at is not None and expires_at <= now:
+                    self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                    return MISSING, None
+                self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(value), expires_at
+
+    def set(self, key: str, value, expires_at=None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), expires_at, time.time()),
+            )
+            # LRU trim on disk too, so the file doesn't grow without bound
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN ("
+                " SELECT key FROM cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def delete(self, key: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache")
+
+
+# -----------------------
+# ⚡ In-memory TTL + LRU cache
+# -----------------------
+class ResultCache:
+    """Thread-safe TTL + LRU cache bounded by entry count and approximate bytes.
+
+    An optional `store` (e.g. SqliteStore) sits behind the memory tier: misses fall
+    through to it and writes go to both.
+    """
+
+    def __init__(self, ttl=3600, max_entries=1024, max_bytes=8 * 1024 * 1024, store=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.store = store
+        self._lock = threading.Lock()
+        self._items = OrderedDict()   # key -> (expires_at, size, value)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _drop(self, key):
+        _, size, _ = self._items.pop(key)
+        self._bytes -= size
+
+    def _put(self, key, value, expires_at):
+        size = _sizeof(value)
+        if size > self.max_bytes:
+            return
+        if key in self._items:
+            self._drop(key)
+        self._items[key] = (expires_at, size, value)
+        self._bytes += size
+        while self._items and (len(self._items) > self.max_entries or self._bytes > self.max_bytes):
+            self._drop(next(iter(self._items)))
+            self.evictions += 1
+
+    def get(self, key, default=MISSING):
+        now = time.time()
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                expires_at, _, value = item
+                if expires_at is None or expires_at > now:
+                    self._items.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._drop(key)
+
+        if self.store is not None:
+            value, expires_at = self.store.get(key)
+            if value is not MISSING:
+                with self._lock:
+                    self._put(key, value, expires_at)
+                    self.hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def peek(self, key, default=MISSING):
+        """Like get(), but leaves hit/miss stats and LRU order untouched."""
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and (item[0] is None or item[0] > time.time()):
+                return item[2]
+        if self.store is not None:
+            value, _ = self.store.get(key)
+            if value is not MISSING:
+                return value
+        return default
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._put(key, value, expires_at)
+        if self.store is not None:
+            self.store.set(key, value, expires_at)
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._items:
+                self._drop(key)
+        if self.store is not None:
+            self.store.delete(key)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+        if self.store is not None:
+            self.store.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._items),
+                "bytes": self._bytes,
+            }
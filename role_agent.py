@@ -1,8 +1,212 @@
+import difflib
 import json
+import os
+import re
+import threading
 
-def load_role_data(json_path="role_mapping.json"):
-    with open(json_path, "r") as f:
-        return json.load(f)
+DEFAULT_ROLE_PATH = "role_mapping.json"
 
-def get_role_details(role, role_data):
-    return role_data.get(role, f"No data found for role: {role}")
+# Extra spellings users (and the model) commonly use for the roles in role_mapping.json.
+# Keys/values are compared after _normalize_role(), so casing and punctuation don't matter.
+ROLE_ALIASES = {
+    "genai engineer": "Gen AI Engineer",
+    "generative ai engineer": "Gen AI Engineer",
+    "large language model engineer": "LLM Engineer",
+    "machine learning engineer": "ML Engineer",
+    "natural language processing engineer": "NLP Engineer",
+    "data analytics": "Data Analyst",
+    "data science": "Data Scientist",
+    "data engineering": "Data Engineer",
+}
+
+_ROLE_SUFFIXES = ("roles", "role", "position", "job", "career")
+
+
+def _normalize_role(text):
+    s = (text or "").lower().replace("&", " and ")
+    s = re.sub(r"[^a-z0-9]+", " ", s).strip()
+    words = s.split()
+    while words and words[-1] in _ROLE_SUFFIXES:
+        words.pop()
+    if words and len(words[-1]) > 3 and words[-1].endswith("s") and not words[-1].endswith("ss"):
+        words[-1] = words[-1][:-1]   # "data scientists" -> "data scientist"
+    return " ".join(words)
+
+
+def _compact(norm):
+    return norm.replace(" ", "")
+
+
+def _word_score(a, b, cutoff):
+    """Similarity of two titles compared word by word; 0.0 unless every word pair is close.
+
+    Shared words ("engineer", "data") match trivially, so the distinguishing word has to be
+    close on its own: "qa engineer" is not "ml engineer". Short words (ML, QA, CV, LLM) are
+    acronyms and must match exactly.
+    """
+    wa, wb = a.split(), b.split()
+    if len(wa) != len(wb):
+        return 0.0
+    scores = []
+    for x, y in zip(wa, wb):
+        if x == y:
+            scores.append(1.0)
+            continue
+        if min(len(x), len(y)) <= 3:
+            return 0.0
+        r = difflib.SequenceMatcher(None, x, y).ratio()
+        if r < cutoff:
+            return 0.0
+        scores.append(r)
+    return sum(scores) / len(scores)
+
+
+# -----------------------
+# 📚 Role Catalog
+# -----------------------
+class RoleCatalog:
+    """Process-wide view of role_mapping.json.
+
+    The file is parsed once and re-read only when its mtime changes. Role names are
+    indexed by normalized name, space-less form ("genai engineer" == "gen ai engineer")
+    and ROLE_ALIASES, with a word-by-word fuzzy fallback for typos ("data scientst"). Anything
+    else resolves to None; callers report it with `suggest()` hints instead of guessing.
+    """
+
+    def __init__(self, json_path=DEFAULT_ROLE_PATH, fuzzy_cutoff=0.8):
+        self.json_path = json_path
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._data = {}
+        self._index = {}
+
+    @property
+    def version(self):
+        """mtime of the loaded file; changes whenever the catalog is reloaded."""
+        self._refresh()
+        return self._mtime
+
+    def _refresh(self):
+        try:
+            mtime = os.stat(self.json_path).st_mtime_ns
+        except OSError:
+            if self._mtime is None:
+                raise
+            return  # file vanished mid-deploy: keep serving the last good copy
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            with open(self.json_path, "r") as f:
+                data = json.load(f)
+            index = {}
+            for name in data:
+                norm = _normalize_role(name)
+                index[norm] = name
+                index.setdefault(_compact(norm), name)
+            for alias, name in ROLE_ALIASES.items():
+                if name in data:
+                    norm = _normalize_role(alias)
+                    index.setdefault(norm, name)
+                    index.setdefault(_compact(norm), name)
+            self._data, self._index, self._mtime = data, index, mtime
+
+    def data(self):
+        self._refresh()
+        return self._data
+
+    def roles(self):
+        return list(self.data().keys())
+
+    def resolve(self, role):
+        """Map free-form role text to a canonical role name, or None."""
+        self._refresh()
+        if role in self._data:
+            return role
+        norm = _normalize_role(role)
+        if not norm:
+            return None
+        hit = self._index.get(norm) or self._index.get(_compact(norm))
+        if hit:
+            return hit
+        return self._fuzzy(norm)
+
+    def _fuzzy(self, norm):
+        best = {}   # canonical name -> best score
+        for key, name in self._index.items():
+            score = _word_score(norm, key, self.fuzzy_cutoff)
+            if score > best.get(name, 0.0):
+                best[name] = score
+        ranked = sorted(best.items(), key=lambda kv: kv[1], reverse=True)
+        if not ranked:
+            return None
+        if len(ranked) > 1 and ranked[0][1] - ranked[1][1] < 0.05:
+            return None   # ambiguous: don't guess between two real roles
+        return ranked[0][0]
+
+    def suggest(self, role, n=3):
+        """Roles that look like `role`, for a "did you mean" hint (never substituted silently)."""
+        self._refresh()
+        norm = _normalize_role(role)
+        close = difflib.get_close_matches(norm, list(self._index), n=n * 3, cutoff=0.6)
+        out = []
+        for key in close:
+            name = self._index[key]
+            if name not in out:
+                out.append(name)
+        return out[:n]
+
+    def find_in_text(self, text, max_words=5):
+        """Canonical role names mentioned in free text (exact index hits, longest first)."""
+        self._refresh()
+        words = _normalize_role(text).split()
+        found, i = [], 0
+        while i < len(words):
+            for n in range(min(max_words, len(words) - i), 0, -1):
+                phrase = " ".join(words[i:i + n])
+                hit = self._index.get(_normalize_role(phrase)) or (n > 1 and self._index.get("".join(words[i:i + n])))
+                if hit:
+                    if hit not in found:
+                        found.append(hit)
+                    i += n
+                    break
+            else:
+                i += 1
+        return found
+
+    def get(self, role):
+        name = self.resolve(role)
+        return self._data.get(name) if name else None
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(json_path=DEFAULT_ROLE_PATH):
+    """Shared RoleCatalog per file path."""
+    key = os.path.abspath(json_path)
+    catalog = _catalogs.get(key)
+    if catalog is None:
+        with _catalogs_lock:
+            catalog = _catalogs.setdefault(key, RoleCatalog(json_path))
+    return catalog
+
+
+def load_role_data(json_path=DEFAULT_ROLE_PATH):
+    return get_catalog(json_path).data()
+
+
+def get_role_details(role, role_data=None):
+    if role_data is None or role_data is get_catalog().data():
+        details = get_catalog().get(role)
+        if details is not None:
+            return details
+    elif role in role_data:
+        return role_data[role]
+    available = ", ".join(get_catalog().roles()) if role_data is None else ", ".join(role_data)
+    hint = get_catalog().suggest(role) if role_data is None else []
+    did_you_mean = f" Did you mean: {', '.join(hint)}?" if hint else ""
+    return f"No data found for role: {role}.{did_you_mean} Available roles: {available}"
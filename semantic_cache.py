@@ -0,0 +1,296 @@
+# semantic_cache.py
+# Reuse answers for paraphrased questions: embed the user message, find the nearest cached
+# question above a similarity threshold, and replay the stored answer as a token stream.
+
+import os
+import re
+import math
+import time
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Union
+
+from role_agent import get_catalog
+
+Vector = Union[Dict[int, float], List[float]]
+
+_WORD_RE = re.compile(r"[a-z0-9+#]+")
+_STOPWORDS = {
+    "a", "an", "the", "to", "of", "for", "in", "on", "is", "are", "be", "do", "does", "i",
+    "me", "you", "can", "could", "would", "should", "what", "which", "please", "tell", "give",
+    "about", "and", "it", "as", "my", "need", "want",
+}
+# Words that flip or narrow a question ("with/without a degree", "not Python", "soft skills",
+# "senior data scientist"); they stay in the embedding and both questions must use the same
+# ones (plus the same numbers) for a hit.
+_CONSTRAINT_WORDS = {
+    "with", "without", "no", "not", "never", "except", "only", "but", "instead", "before", "after",
+    "soft", "hard", "technical", "senior", "junior", "entry", "lead", "principal", "intern",
+    "internship", "beginner", "beginners", "advanced", "intermediate", "remote", "freelance",
+    "part", "full", "free", "paid", "certification", "certifications", "degree",
+}
+
+
+def constraints(text: str) -> frozenset:
+    return frozenset(w for w in _normalize(text).split() if w in _CONSTRAINT_WORDS or any(c.isdigit() for c in w))
+
+
+def content_terms(text: str) -> frozenset:
+    """Non-stopword words, plural-folded: the local embedder only hits on the same set, so a
+    narrower question ("soft skills", "senior …") never gets the broader answer."""
+    return frozenset(_stem(w) for w in _normalize(text).split() if w not in _STOPWORDS)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(_WORD_RE.findall((text or "").lower()))
+
+
+def _stem(word: str) -> str:
+    return word[:-1] if len(word) > 3 and word.endswith("s") else word
+
+
+# -----------------------
+# 🔢 Embedders
+# -----------------------
+class HashingEmbedder:
+    """Local, dependency-free embedder: hashed word + char-trigram features, L2-normalized.
+
+    Cheap enough to run per request; good at catching reordered / lightly reworded questions.
+    """
+
+    def __init__(self, dims: int = 1 << 18):
+        self.dims = dims
+
+    def _bucket(self, feature: str) -> int:
+        return int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little") % self.dims
+
+    def embed(self, text: str) -> Dict[int, float]:
+        words = [w for w in _normalize(text).split() if w not in _STOPWORDS]
+        feats: Dict[int, float] = {}
+        for w in words:
+            stem = _stem(w)
+            b = self._bucket("w:" + stem)
+            feats[b] = feats.get(b, 0.0) + 2.0
+            padded = f" {stem} "
+            for i in range(len(padded) - 2):
+                b = self._bucket("c:" + padded[i:i + 3])
+                feats[b] = feats.get(b, 0.0) + 1.0
+        norm = math.sqrt(sum(v * v for v in feats.values())) or 1.0
+        return {k: v / norm for k, v in feats.items()}
+
+    def __call__(self, text: str) -> Dict[int, float]:
+        return self.embed(text)
+
+
+class LangChainEmbedder:
+    """Adapter for any LangChain `Embeddings` (e.g. OpenAIEmbeddings); returns dense unit vectors."""
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+
+    def __call__(self, text: str) -> List[float]:
+        vec = self.embeddings.embed_query(text)
+        norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+        return [v / norm for v in vec]
+
+
+def _dot(a: Vector, b: Vector) -> float:
+    if isinstance(a, dict):
+        if len(a) > len(b):
+            a, b = b, a
+        return sum(v * b.get(k, 0.0) for k, v in a.items())
+    return sum(x * y for x, y in zip(a, b))
+
+
+# -----------------------
+# 🧠 Cache
+# -----------------------
+class SemanticCache:
+    """Nearest-neighbour answer cache with TTL, size cap and catalog-version invalidation.
+
+    Sparse vectors (HashingEmbedder) are indexed by feature so a lookup only scores
+    entries that share at least one feature; dense vectors fall back to a full scan.
+    A hit also requires both questions to mention the same catalog roles, so
+    "ML Engineer" and "NLP Engineer" never share an answer however close they embed,
+    and the same constraint words/numbers ("with" vs "without a degree", "3" vs "6 months").
+    With the HashingEmbedder the whole content-word set must match (see content_terms):
+    its trigram features score narrower questions too close to the broad one.
+    """
+
+    def __init__(
+        self,
+        embedder: Optional[Callable[[str], Vector]] = None,
+        threshold: float = 0.88,
+        ttl: float = 6 * 3600,
+        max_entries: int = 512,
+        version_fn: Optional[Callable[[], object]] = None,
+    ):
+        self.embedder = embedder or HashingEmbedder()
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.version_fn = version_fn or (lambda: get_catalog().version)
+        self.roles_fn = lambda text: frozenset(get_catalog().find_in_text(text))
+        self.guard_fn = content_terms if isinstance(self.embedder, HashingEmbedder) else constraints
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # id -> (expires_at, vector, question, answer, roles, guard terms)
+        self._postings: Dict[int, set] = {}
+        self._exact: Dict[str, int] = {}
+        self._next_id = 0
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    # --- internals (call with lock held) ---
+    def _remove(self, eid):
+        _, vec, question, _, _, _ = self._entries.pop(eid)
+        if isinstance(vec, dict):
+            for k in vec:
+                ids = self._postings.get(k)
+                if ids is not None:
+                    ids.discard(eid)
+                    if not ids:
+                        del self._postings[k]
+        if self._exact.get(_normalize(question)) == eid:
+            del self._exact[_normalize(question)]
+
+    def _check_version(self):
+        try:
+            version = self.version_fn()
+        except Exception:
+            return
+        if self._version is not None and version != self._version and self._entries:
+            self._entries.clear()
+            self._postings.clear()
+            self._exact.clear()
+            self.invalidations += 1
+        self._version = version
+
+    def _candidates(self, vec):
+        if isinstance(vec, dict):
+            ids = set()
+            for k in vec:
+                ids |= self._postings.get(k, set())
+            return ids
+        return list(self._entries)
+
+    # --- public API ---
+    def lookup(self, question: str) -> Optional[str]:
+        vec = self.embedder(question)
+        roles = self.roles_fn(question)
+        guard = self.guard_fn(question)
+        now = time.time()
+        with self._lock:
+            self._check_version()
+            best_id = self._exact.get(_normalize(question))
+            if best_id is None:
+                best_score = self.threshold
+                for eid in self._candidates(vec):
+                    entry = self._entries[eid]
+                    if entry[4] != roles or entry[5] != guard:
+                        continue
+                    score = _dot(vec, entry[1])
+                    if score >= best_score:
+                        best_id, best_score = eid, score
+            if best_id is not None:
+                expires_at, _, _, answer, _, _ = self._entries[best_id]
+                if expires_at > now:
+                    self._entries.move_to_end(best_id)
+                    self.hits += 1
+                    return answer
+                self._remove(best_id)
+            self.misses += 1
+            return None
+
+    def store(self, question: str, answer: str):
+        if not (question or "").strip() or not (answer or "").strip():
+            return
+        vec = self.embedder(question)
+        roles = self.roles_fn(question)
+        with self._lock:
+            self._check_version()
+            old = self._exact.get(_normalize(question))
+            if old is not None:
+                self._remove(old)
+            eid = self._next_id
+            self._next_id += 1
+            self._entries[eid] = (time.time() + self.ttl, vec, question, answer, roles, self.guard_fn(question))
+            self._exact[_normalize(question)] = eid
+            if isinstance(vec, dict):
+                for k in vec:
+                    self._postings.setdefault(k, set()).add(eid)
+            self.stores += 1
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._postings.clear()
+            self._exact.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+            }
+
+
+# -----------------------
+# ▶️ Replay
+# -----------------------
+_TOKEN_RE = re.compile(r"\S+\s*|\s+")
+
+
+def iter_replay(answer: str, words_per_chunk: int = 4):
+    """Split a stored answer into small word chunks that look like model deltas."""
+    buf = []
+    for tok in _TOKEN_RE.findall(answer or ""):
+        buf.append(tok)
+        if len(buf) >= words_per_chunk:
+            yield "".join(buf)
+            buf = []
+    if buf:
+        yield "".join(buf)
+
+
+async def replay(answer: str, words_per_chunk: int = 4):
+    for chunk in iter_replay(answer, words_per_chunk):
+        yield chunk
+        await asyncio.sleep(0)   # let other streams run between chunks
+
+
+def _use_openai() -> bool:
+    return os.getenv("SEMANTIC_CACHE_EMBEDDER", "local").lower() == "openai"
+
+
+def _default_embedder():
+    if _use_openai():
+        from langchain_openai import OpenAIEmbeddings
+        return LangChainEmbedder(OpenAIEmbeddings(model=os.getenv("SEMANTIC_CACHE_MODEL", "text-embedding-3-small")))
+    return HashingEmbedder()
+
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE", "1").lower() not in {"0", "false", "no", "off"}
+
+# Process-wide instance shared by server.py and app.py
+semantic_cache = SemanticCache(
+    embedder=_default_embedder(),
+    # the hashing embedder scores near-misses high (0.89-0.91), so it needs a stricter cut
+    threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.88" if _use_openai() else "0.93")),
+    ttl=float(os.getenv("SEMANTIC_CACHE_TTL", str(6 * 3600))),
+    max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "512")),
+)
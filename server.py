@@ -1,44 +1,495 @@
-from fastapi import FastAPI, Request
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, Request, HTTPException, Response
+from fastapi.responses import StreamingResponse, PlainTextResponse, JSONResponse
 from langchain_core.messages import HumanMessage
 from gradpath_graph import compiled_graph
+from fast_path import fast_answer, warm_resources
+from semantic_cache import semantic_cache, iter_replay, SEMANTIC_CACHE_ENABLED
+from streaming import framed, pick_format, MEDIA_TYPES
+from resource_agent import resource_cache, aclose_http_clients
+from history import history_manager, messages_from_dicts
+from result_cache import normalize_query
+from sessions import SessionStore, get_session_store
+from knowledge_graph_formatter import (
+    LocalGraphBuilder, ENGINES, generate_graph_json, arace_graph_json, graph_cache_key, kg_cache,
+)
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+import metrics
+import functools
+import contextvars
+import hashlib
+import json
 import asyncio
+import os
 
 app = FastAPI()
 
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "32"))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+
+metrics.register_cache("resources", resource_cache.stats)
+metrics.register_cache("semantic", semantic_cache.stats)
+metrics.register_cache("sessions", get_session_store().stats)
+metrics.register_cache("kg", kg_cache.stats)
+
+@app.on_event("startup")
+async def _warm_fast_path():
+    # Optional: prefetch YouTube/GitHub links for every role so fast answers include them
+    if os.getenv("GRADPATH_FAST_PATH_WARM", "0") == "1":
+        asyncio.create_task(warm_resources())
+
+@app.on_event("shutdown")
+async def _close_sessions():
+    await get_session_store().aclose()
+
+@app.on_event("shutdown")
+async def _close_http_clients():
+    await aclose_http_clients()
+
 @app.get("/")
 def health():
     return {"message": "🚀 GradPath AI streaming backend running"}
 
+@app.get("/metrics")
+def prometheus_metrics():
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+# -----------------------------------------------------------------------------
+# Event sources: each yields (kind, text) tuples -> streaming.framed()
+# -----------------------------------------------------------------------------
+async def _replay_events(text: str):
+    for chunk in iter_replay(text, words_per_chunk=8):
+        yield ("token", chunk)
+    yield ("done", "")
+
+async def _agent_events(input_state: dict, on_answer=None, graph=None, config=None, after=None):
+    answer, stopped = [], False
+    graph = graph or compiled_graph
+    # v2 events give you model token deltas + tool events
+    async for event in graph.astream_events(input=input_state, config=config, version="v2"):
+        ev = event.get("event", "")
+        data = event.get("data", {})
+
+        # 1) Stream model token deltas
+        if ev == "on_chat_model_stream":
+            chunk = data.get("chunk")
+            text = getattr(chunk, "content", "")
+            if text:
+                answer.append(text)
+                yield ("token", text)
+
+        # 2) Stream tool results as soon as a tool returns
+        if ev == "on_tool_end":
+            out = data.get("output")
+            if out:
+                yield ("tool_result", str(getattr(out, "content", out)))
+
+        # 3) Root run finished: report if the agent budget cut it short
+        if ev == "on_chain_end" and not event.get("parent_ids"):
+            out = data.get("output")
+            reason = out.get("stop_reason") if isinstance(out, dict) else None
+            if reason:
+                stopped = True
+                yield ("stop_reason", reason)
+
+    # a run cut short by the budget is not an answer worth replaying from the cache
+    if on_answer is not None and not stopped:
+        on_answer("".join(answer))
+    if after is not None:
+        await after()
+    yield ("done", "")
+
+async def _session_replay_events(text: str, session_id: str, user_input: str):
+    async for event in _replay_events(text):
+        if event[0] == "done":
+            await get_session_store().append_turn(session_id, user_input, text)
+        yield event
+
+async def _traced(events, trace, emit: bool):
+    # runs inside the streaming task, so graph nodes/tools see this trace as current
+    metrics.bind_trace(trace)
+    finished = False
+    try:
+        async for kind, text in events:
+            if kind == "token":
+                trace.first_token()
+            if kind == "done":
+                finished = True
+                metrics.finish_trace(trace)
+                if emit:
+                    yield ("trace", json.dumps(trace.to_dict()))
+            yield (kind, text)
+    finally:
+        if not finished:   # errored or client went away
+            metrics.finish_trace(trace)
+
+async def _graph_events(events, topic: str = ""):
+    """Pass events through, adding a "graph" delta whenever a streamed line completes a node."""
+    builder = LocalGraphBuilder(topic)
+    async for kind, text in events:
+        if kind == "done":
+            delta = builder.close().take_delta()
+            if delta["nodes"] or delta["edges"]:
+                yield ("graph", json.dumps(delta, ensure_ascii=False))
+        yield (kind, text)
+        if kind == "token":
+            delta = builder.feed(text).take_delta()
+            if delta["nodes"] or delta["edges"]:
+                yield ("graph", json.dumps(delta, ensure_ascii=False))
+
+def _stream(events, fmt: str, route: str, emit_trace: bool = False, session_id: str = None,
+            graph_topic: Optional[str] = None):
+    if graph_topic is not None:
+        events = _graph_events(events, graph_topic)
+    trace = metrics.RequestTrace(route)
+    headers = {"X-GradPath-Route": route, "X-Request-ID": trace.request_id, "Cache-Control": "no-cache"}
+    if session_id:
+        headers["X-Session-ID"] = session_id
+    return StreamingResponse(framed(_traced(events, trace, emit_trace), fmt), media_type=MEDIA_TYPES[fmt],
+                             headers=headers)
+
 @app.post("/chat")
 async def chat(request: Request):
+    return await _chat(request, await request.json())
+
+@app.post("/chat/graph")
+async def chat_graph(request: Request):
+    # Same as /chat plus "graph" events: {"nodes", "edges", "removed_nodes", "removed_edges"}
+    # deltas of the career map, built from the answer while it streams (NDJSON unless "sse")
     body = await request.json()
+    if pick_format(body.get("format", ""), request.headers.get("accept", "")) == "text":
+        body["format"] = "ndjson"
+    return await _chat(request, body, graph_topic=body.get("topic") or "")
+
+async def _chat(request: Request, body: dict, graph_topic: Optional[str] = None):
     user_input = body.get("message", "")
+    # "format": "text" (default) | "ndjson" | "sse" -- or send a matching Accept header
+    fmt = pick_format(body.get("format", ""), request.headers.get("accept", ""))
+    # per-request timing breakdown as a final "trace" event (NDJSON/SSE formats)
+    trace = bool(body.get("trace")) or request.headers.get("x-gradpath-trace") == "1"
+    stream = functools.partial(_stream, fmt=fmt, emit_trace=trace, graph_topic=graph_topic)
+
+    # Server-side session: send "session_id" (or "new_session": true) and only the new turn;
+    # prior messages live in the graph checkpointer (see sessions.py)
+    session_id = body.get("session_id") or (SessionStore.new_id() if body.get("new_session") else None)
+    if session_id:
+        return await _session_chat(session_id, user_input, body, stream)
+
+    # Canonical "roadmap/skills for <role>" questions skip the LLM entirely
+    # (disable globally with GRADPATH_FAST_PATH=0 or per request with "fast_path": false)
+    quick = fast_answer(user_input, enabled=body.get("fast_path"))
+    if quick is not None:
+        return stream(_replay_events(quick), route="fast_path")
+
+    # Optional prior turns: [{"role": "user"|"assistant", "content": ...}, ...]
+    raw_history = body.get("history") or []
+    if not isinstance(raw_history, list) or not all(isinstance(h, dict) for h in raw_history):
+        raise HTTPException(status_code=400, detail='"history" must be a list of {"role", "content"} objects')
+    history = messages_from_dicts(raw_history)
+
+    # Paraphrases of questions we've already answered replay the stored answer
+    # (standalone questions only; follow-ups depend on the conversation)
+    use_cache = SEMANTIC_CACHE_ENABLED and body.get("cache", True) and not history
+    cached = semantic_cache.lookup(user_input) if use_cache else None
+    if cached is not None:
+        return stream(_replay_events(cached), route="semantic_cache")
+
+    input_state = {"messages": history_manager.prepare(history + [HumanMessage(content=user_input)])}
+    store = (lambda answer: semantic_cache.store(user_input, answer)) if use_cache else None
+    return stream(_agent_events(input_state, on_answer=store), route="agent")
+
+async def _session_chat(session_id: str, user_input: str, body: dict, stream):
+    sessions = get_session_store()
+    await sessions.touch(session_id)
+
+    quick = fast_answer(user_input, enabled=body.get("fast_path"))
+    if quick is not None:
+        return stream(_session_replay_events(quick, session_id, user_input), route="fast_path", session_id=session_id)
+
+    # the checkpointer appends this turn to the stored messages; no semantic cache for follow-ups
+    graph = await sessions.graph()
+    events = _agent_events({"messages": [HumanMessage(content=user_input)]}, graph=graph,
+                           config=sessions.config(session_id),
+                           after=lambda: sessions.enforce_cap(session_id))
+    return stream(events, route="agent", session_id=session_id)
 
-    input_state = {"messages": [HumanMessage(content=user_input)]}
+@app.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    await get_session_store().delete(session_id)
+    return {"deleted": session_id}
 
-    async def token_stream():
+# -----------------------------------------------------------------------------
+# Batch: many independent questions, NDJSON line per question as each finishes
+# -----------------------------------------------------------------------------
+async def _answer_one(message: str, body: dict) -> dict:
+    """Fast path -> semantic cache -> agent, for one standalone question."""
+    quick = fast_answer(message, enabled=body.get("fast_path"))
+    if quick is not None:
+        return {"route": "fast_path", "answer": quick}
+    use_cache = SEMANTIC_CACHE_ENABLED and body.get("cache", True)
+    cached = semantic_cache.lookup(message) if use_cache else None
+    if cached is not None:
+        return {"route": "semantic_cache", "answer": cached}
+    state = await compiled_graph.ainvoke({"messages": [HumanMessage(content=message)]})
+    answer = str(state["messages"][-1].content)
+    if use_cache and not state.get("stop_reason"):
+        semantic_cache.store(message, answer)
+    return {"route": "agent", "answer": answer, "stop_reason": state.get("stop_reason")}
+
+async def _batch_events(groups, messages: list, body: dict, concurrency: int):
+    sem = asyncio.Semaphore(concurrency)
+    done = asyncio.Queue()
+
+    async def run(indexes, message):
+        async with sem:
+            trace = metrics.RequestTrace("batch")
+            metrics.bind_trace(trace)   # each task has its own context copy
+            try:
+                result = await _answer_one(message, body)
+            except Exception as e:
+                result = {"route": "error", "error": f"{type(e).__name__}: {e}"}
+            metrics.finish_trace(trace)
+        result["ms"] = trace.to_dict()["total_ms"]
+        await done.put((indexes, message, result))
+
+    # identical questions (after normalization) run once; tool calls for the same
+    # role are shared through resource_agent's cache + in-flight dedupe
+    tasks = [asyncio.create_task(run(indexes, message)) for message, indexes in groups]
+    try:
+        for _ in range(len(tasks)):
+            indexes, message, result = await done.get()
+            for i in indexes:
+                # duplicates share the answer but echo their own spelling
+                line = {"index": i, "message": messages[i], **result}
+                if i != indexes[0]:
+                    line["duplicate_of"] = indexes[0]
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+    finally:
+        for t in tasks:   # client went away
+            t.cancel()
+
+@app.post("/chat/batch")
+async def chat_batch(request: Request):
+    # {"messages": ["q1", "q2", ...], "concurrency": 8, "fast_path": true, "cache": true}
+    body = await request.json()
+    messages = body.get("messages")
+    if not isinstance(messages, list) or not all(isinstance(m, str) for m in messages):
+        raise HTTPException(status_code=400, detail='"messages" must be a list of strings')
+    if len(messages) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"at most {BATCH_MAX_ITEMS} messages per batch")
+    concurrency = body.get("concurrency") or BATCH_CONCURRENCY
+    if isinstance(concurrency, bool) or not isinstance(concurrency, int):
+        raise HTTPException(status_code=400, detail='"concurrency" must be an integer')
+    concurrency = max(1, min(concurrency, BATCH_MAX_CONCURRENCY))
+
+    groups = {}   # normalized question -> (first spelling, [indexes])
+    for i, message in enumerate(messages):
+        groups.setdefault(normalize_query(message), (message, []))[1].append(i)
+    return StreamingResponse(_batch_events(list(groups.values()), messages, body, concurrency),
+                             media_type=MEDIA_TYPES["ndjson"],
+                             headers={"Cache-Control": "no-cache", "X-Batch-Unique": str(len(groups))})
+
+# -----------------------------------------------------------------------------
+# Knowledge graphs: /kg (one doc, streamed status) and /kg/batch (NDJSON line per doc)
+# -----------------------------------------------------------------------------
+KG_WORKERS = int(os.getenv("KG_WORKERS", "4"))            # graphs generated at once
+KG_MAX_PENDING = int(os.getenv("KG_MAX_PENDING", "64"))   # /kg answers 503 beyond this
+KG_MAX_DOC_CHARS = int(os.getenv("KG_MAX_DOC_CHARS", "200000"))
+KG_BATCH_MAX_ITEMS = int(os.getenv("KG_BATCH_MAX_ITEMS", "100"))
+
+_kg_slots = asyncio.Semaphore(KG_WORKERS)
+# builds (local extraction, cache reads/writes, sync LLM calls) run here, never on the event loop
+_kg_pool = ThreadPoolExecutor(max_workers=KG_WORKERS, thread_name_prefix="gradpath-kg")
+_kg_pending = 0
+
+# request fields (and defaults) passed through to generate_graph_json / arace_graph_json
+_KG_FIELDS = {"topic": "", "model": "gpt-4o-mini", "temperature": 0.0, "strict": True,
+              "engine": "llm", "race": False, "chunk_chars": None, "cache": True}
+
+def _kg_params(spec: dict, defaults: Optional[dict] = None) -> dict:
+    """Validate one KG request; per-item fields win over batch-level ones."""
+    defaults = defaults or {}
+    params = {k: spec.get(k, defaults.get(k, v)) for k, v in _KG_FIELDS.items()}
+    doc = spec.get("doc")
+    if not isinstance(doc, str) or not doc.strip():
+        raise HTTPException(status_code=400, detail='"doc" must be a non-empty string')
+    if len(doc) > KG_MAX_DOC_CHARS:
+        raise HTTPException(status_code=413, detail=f"doc longer than {KG_MAX_DOC_CHARS} chars")
+    if params["engine"] not in ENGINES:
+        raise HTTPException(status_code=400, detail=f'"engine" must be one of {list(ENGINES)}')
+    for field in ("topic", "model"):
+        if not isinstance(params[field], str):
+            raise HTTPException(status_code=400, detail=f'"{field}" must be a string')
+    for field in ("strict", "race", "cache"):
+        if not isinstance(params[field], bool):
+            raise HTTPException(status_code=400, detail=f'"{field}" must be true or false')
+    temperature = params["temperature"]
+    if isinstance(temperature, bool) or not isinstance(temperature, (int, float)) or not 0 <= temperature <= 2:
+        raise HTTPException(status_code=400, detail='"temperature" must be a number between 0 and 2')
+    params["temperature"] = float(temperature)
+    chunk_chars = params["chunk_chars"]
+    if chunk_chars is not None and (isinstance(chunk_chars, bool) or not isinstance(chunk_chars, int)
+                                    or chunk_chars < 0):
+        raise HTTPException(status_code=400, detail='"chunk_chars" must be a non-negative integer or null')
+    params["doc"] = doc
+    return params
+
+def _kg_key(params: dict) -> str:
+    # hash of the doc + everything that shapes the graph; batch items with equal keys are built once
+    engine = params["engine"]
+    if params["race"] and engine != "local":
+        engine += "/race"
+    if params["chunk_chars"] is not None:
+        engine += f"/chunks:{params['chunk_chars']}"
+    return graph_cache_key(params["doc"], params["topic"], params["model"], params["temperature"],
+                           params["strict"], engine=engine)
+
+def _kg_etag(payload: dict) -> str:
+    # tag the graph actually produced: an LLM rebuild or a race that fell back to the
+    # local graph gets a new tag even when the inputs are unchanged
+    blob = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return '"' + hashlib.sha256(blob.encode("utf-8")).hexdigest()[:32] + '"'
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    tags = {t.strip() for t in (if_none_match or "").split(",")}
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+def _build_kg_sync(params: dict) -> dict:
+    return generate_graph_json(params["doc"], params["topic"], params["model"], params["temperature"],
+                               strict=params["strict"], use_cache=params["cache"],
+                               engine=params["engine"], chunk_chars=params["chunk_chars"])
+
+async def _build_kg(params: dict):
+    """-> (payload, mode) with mode "strict" | "lenient" | "hybrid" | "local" | "local fallback"."""
+    if params["race"]:
+        # both LLM calls are awaited on the loop; the formatter hands its cache and
+        # local-build work to threads
+        return await arace_graph_json(params["doc"], params["topic"], params["model"], params["temperature"],
+                                      use_cache=params["cache"], engine=params["engine"],
+                                      chunk_chars=params["chunk_chars"])
+    loop = asyncio.get_running_loop()
+    payload = await loop.run_in_executor(
+        _kg_pool, functools.partial(contextvars.copy_context().run, _build_kg_sync, params))
+    if params["engine"] != "llm":
+        return payload, params["engine"]
+    return payload, "strict" if params["strict"] else "lenient"
+
+async def _run_kg(params: dict, on_start=None):
+    """Run one build in the bounded pool (KG_WORKERS at a time) -> (payload, mode, ms)."""
+    global _kg_pending
+    trace = metrics.RequestTrace("kg")
+    metrics.bind_trace(trace)
+    _kg_pending += 1
+    try:
+        async with _kg_slots:
+            if on_start is not None:
+                on_start()
+            payload, mode = await _build_kg(params)
+    finally:
+        _kg_pending -= 1
+        metrics.finish_trace(trace)
+    return payload, mode, trace.to_dict()["total_ms"]
+
+async def _kg_events(params: dict, if_none_match: Optional[str] = None):
+    started = asyncio.Event()
+    task = asyncio.create_task(_run_kg(params, on_start=started.set))
+    try:
+        yield ("status", json.dumps({"state": "queued", "pending": _kg_pending}))
+        waiter = asyncio.create_task(started.wait())
+        await asyncio.wait([task, waiter], return_when=asyncio.FIRST_COMPLETED)
+        waiter.cancel()
+        yield ("status", json.dumps({"state": "running"}))
+        payload, mode, ms = await task
+        etag = _kg_etag(payload)
+        if _etag_matches(if_none_match, etag):
+            state = "not_modified"   # the client's copy is current; skip the graph
+        else:
+            state = "done"
+            yield ("graph", json.dumps(payload, ensure_ascii=False))
+        yield ("status", json.dumps({"state": state, "mode": mode, "etag": etag, "ms": ms}))
+    except Exception as e:
+        yield ("error", f"{type(e).__name__}: {e}")
+    finally:
+        task.cancel()   # client went away
+    yield ("done", "")
+
+@app.post("/kg")
+async def kg(request: Request):
+    # {"doc": "...", "topic": "...", "engine": "llm"|"hybrid"|"local", "strict": true, "race": false,
+    #  "format": "ndjson"|"sse"} -- NDJSON/SSE stream status events then the graph; otherwise plain JSON
+    body = await request.json()
+    params = _kg_params(body)
+    if_none_match = request.headers.get("if-none-match")
+    if _kg_pending >= KG_MAX_PENDING:
+        raise HTTPException(status_code=503, detail="knowledge-graph workers busy", headers={"Retry-After": "1"})
+
+    fmt = pick_format(body.get("format", ""), request.headers.get("accept", ""))
+    if fmt != "text":
+        # the tag is only known once the graph is built: it arrives in the final status event
+        return StreamingResponse(framed(_kg_events(params, if_none_match), fmt), media_type=MEDIA_TYPES[fmt],
+                                 headers={"Cache-Control": "no-cache"})
+    try:
+        payload, mode, _ = await _run_kg(params)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"graph generation failed: {type(e).__name__}: {e}")
+    etag = _kg_etag(payload)
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "X-KG-Mode": mode}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(payload, headers=headers)
+
+async def _kg_batch_events(groups):
+    done = asyncio.Queue()
+
+    async def run(params, items):
         try:
-            # v2 events give you model token deltas + tool events
-            async for event in compiled_graph.astream_events(input=input_state, version="v2"):
-                ev = event.get("event", "")
-                data = event.get("data", {})
-
-                # 1) Stream model token deltas
-                if ev == "on_chat_model_stream":
-                    chunk = data.get("chunk")
-                    text = getattr(chunk, "content", "")
-                    if text:
-                        yield text
-                        await asyncio.sleep(0.002)
-
-                # 2) (Optional) stream tool results as soon as a tool returns
-                if ev == "on_tool_end":
-                    out = data.get("output")
-                    if out:
-                        # prettify a little for links
-                        yield f"\n\n---\n**Tool result**:\n{out}\n"
+            payload, mode, ms = await _run_kg(params)
+            result = (_kg_etag(payload), {"mode": mode, "ms": ms}, payload)
         except Exception as e:
-            yield f"\n[ERROR] {str(e)}"
+            result = (None, {"status": "error", "error": f"{type(e).__name__}: {e}"}, None)
+        await done.put((items, result))
+
+    tasks = [asyncio.create_task(run(params, items)) for params, items in groups.values()]
+    try:
+        for _ in range(len(tasks)):
+            items, (etag, info, payload) = await done.get()
+            first = items[0][0]
+            for i, client_etag in items:
+                if etag is None:
+                    line = {"index": i, **info}
+                elif _etag_matches(client_etag, etag):
+                    line = {"index": i, "etag": etag, "status": "not_modified", **info}
+                else:
+                    line = {"index": i, "etag": etag, "status": "ok", **info, "payload": payload}
+                if i != first:
+                    line["duplicate_of"] = first
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+    finally:
+        for t in tasks:   # client went away
+            t.cancel()
 
-    return StreamingResponse(token_stream(), media_type="text/plain")
+@app.post("/kg/batch")
+async def kg_batch(request: Request):
+    # {"items": [{"doc": "...", "topic": "...", "etag": "<ETag from an earlier response>"}, ...],
+    #  "engine": "local", ...}: top-level fields are defaults for every item
+    body = await request.json()
+    items = body.get("items")
+    if not isinstance(items, list) or not all(isinstance(i, dict) for i in items):
+        raise HTTPException(status_code=400, detail='"items" must be a list of objects')
+    if len(items) > KG_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"at most {KG_BATCH_MAX_ITEMS} items per batch")
+    defaults = {k: body[k] for k in _KG_FIELDS if k in body}
+
+    groups = {}   # input key -> (params, [(index, client etag)])
+    for i, item in enumerate(items):
+        try:
+            params = _kg_params(item, defaults)
+        except HTTPException as e:
+            raise HTTPException(status_code=e.status_code, detail=f"items[{i}]: {e.detail}")
+        groups.setdefault(_kg_key(params), (params, []))[1].append((i, item.get("etag")))
+    # an idle server takes any batch; otherwise the batch's builds must fit under the cap
+    if _kg_pending and _kg_pending + len(groups) > KG_MAX_PENDING:
+        raise HTTPException(status_code=503, detail="knowledge-graph workers busy", headers={"Retry-After": "1"})
+    return StreamingResponse(_kg_batch_events(groups), media_type=MEDIA_TYPES["ndjson"],
+                             headers={"Cache-Control": "no-cache", "X-Batch-Unique": str(len(groups))})
@@ -0,0 +1,160 @@
+# sessions.py
+# Server-side chat sessions for /chat: message state lives in a LangGraph checkpointer keyed by
+# session id (thread_id), with LRU/TTL eviction and a per-session token cap.
+
+import os
+import time
+import uuid
+import asyncio
+from collections import OrderedDict
+from typing import Optional
+
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
+
+from history import HistoryManager, count_tokens
+
+SESSION_TTL = float(os.getenv("SESSION_TTL_SECONDS", "3600"))
+SESSION_MAX = int(os.getenv("SESSION_MAX", "1000"))
+SESSION_MAX_TOKENS = int(os.getenv("SESSION_MAX_TOKENS", "12000"))
+SESSION_DB = os.getenv("SESSION_DB", "")   # sqlite path -> sessions survive restarts
+
+
+class SessionStore:
+    """Owns the checkpointer, the session-aware compiled graph and the eviction index.
+
+    In-memory (InMemorySaver) by default; with `db_path` uses AsyncSqliteSaver from the
+    optional langgraph-checkpoint-sqlite package and keeps the access index in the same file.
+    """
+
+    def __init__(self, builder, ttl=SESSION_TTL, max_sessions=SESSION_MAX,
+                 max_tokens=SESSION_MAX_TOKENS, db_path=SESSION_DB):
+        self.builder = builder
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_tokens = max_tokens
+        self.db_path = db_path
+        # compaction keeps stored state under the cap; the prompt itself is trimmed in model_node
+        self.compactor = HistoryManager(max_prompt_tokens=max_tokens, window_tokens=max_tokens // 2)
+        self._index = OrderedDict()   # session_id -> last access (epoch seconds)
+        self._graph = None
+        self._saver = None
+        self._conn = None
+        self._lock = asyncio.Lock()
+        self.evictions = 0
+
+    async def graph(self):
+        if self._graph is None:
+            async with self._lock:
+                if self._graph is None:
+                    self._saver = await self._make_saver()
+                    self._graph = self.builder.compile(checkpointer=self._saver)
+        return self._graph
+
+    async def _make_saver(self):
+        if not self.db_path:
+            return InMemorySaver()
+        try:
+            import aiosqlite
+            from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+        except ImportError as e:
+            raise RuntimeError("SESSION_DB needs `pip install langgraph-checkpoint-sqlite aiosqlite`") from e
+        self._conn = await aiosqlite.connect(self.db_path)
+        saver = AsyncSqliteSaver(self._conn)
+        await saver.setup()
+        await self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_index (session_id TEXT PRIMARY KEY, last_access REAL NOT NULL)"
+        )
+        async with self._conn.execute("SELECT session_id, last_access FROM session_index ORDER BY last_access") as cur:
+            async for sid, ts in cur:
+                self._index[sid] = ts
+        await self._conn.commit()
+        return saver
+
+    @staticmethod
+    def new_id() -> str:
+        return uuid.uuid4().hex
+
+    @staticmethod
+    def config(session_id: str, **configurable) -> dict:
+        return {"configurable": {"thread_id": session_id, **configurable}}
+
+    async def touch(self, session_id: str):
+        """Mark a session as used and evict expired / least-recently-used ones."""
+        await self.graph()
+        now = time.time()
+        last = self._index.get(session_id)
+        if last is not None and now - last > self.ttl:
+            # expired: this request starts a fresh session under the same id
+            await self.delete(session_id)
+            self.evictions += 1
+        self._index[session_id] = now
+        self._index.move_to_end(session_id)
+        if self._conn is not None:
+            await self._conn.execute(
+                "INSERT OR REPLACE INTO session_index (session_id, last_access) VALUES (?, ?)", (session_id, now)
+            )
+            await self._conn.commit()
+
+        stale = [sid for sid, ts in self._index.items() if sid != session_id and now - ts > self.ttl]
+        overflow = len(self._index) - len(stale) - self.max_sessions
+        if overflow > 0:
+            live = [sid for sid in self._index if sid not in stale and sid != session_id]
+            stale += live[:overflow]
+        for sid in stale:
+            await self.delete(sid)
+            self.evictions += 1
+
+    async def delete(self, session_id: str):
+        self._index.pop(session_id, None)
+        await (await self.graph()).checkpointer.adelete_thread(session_id)
+        if self._conn is not None:
+            await self._conn.execute("DELETE FROM session_index WHERE session_id = ?", (session_id,))
+            await self._conn.commit()
+
+    async def messages(self, session_id: str):
+        snapshot = await (await self.graph()).aget_state(self.config(session_id))
+        return list(snapshot.values.get("messages", [])) if snapshot and snapshot.values else []
+
+    async def append_turn(self, session_id: str, user_text: str, answer: str):
+        """Record a turn answered outside the graph (fast path / cache) in the session."""
+        graph = await self.graph()
+        await graph.aupdate_state(
+            self.config(session_id),
+            {"messages": [HumanMessage(content=user_text), AIMessage(content=answer)]},
+            as_node="model",
+        )
+        await self.enforce_cap(session_id)
+
+    async def enforce_cap(self, session_id: str):
+        """Fold old turns into a summary once stored messages exceed `max_tokens`."""
+        messages = await self.messages(session_id)
+        if count_tokens(messages) <= self.max_tokens:
+            return
+        compacted = self.compactor.prepare(messages)
+        graph = await self.graph()
+        await graph.aupdate_state(
+            self.config(session_id),
+            {"messages": [RemoveMessage(id=REMOVE_ALL_MESSAGES)] + compacted},
+            as_node="model",
+        )
+
+    async def aclose(self):
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    def stats(self) -> dict:
+        return {"entries": len(self._index), "evictions": self.evictions}
+
+
+_store: Optional[SessionStore] = None
+
+
+def get_session_store() -> SessionStore:
+    global _store
+    if _store is None:
+        from gradpath_graph import graph
+        _store = SessionStore(graph)
+    return _store
@@ -0,0 +1,126 @@
+# streaming.py
+# Coalesce model deltas into fewer, larger writes and frame them as plain text, NDJSON or SSE.
+
+import os
+import json
+import time
+import asyncio
+from typing import AsyncIterator, Tuple
+
+# An event is (kind, text): kind in {"token", "tool_result", "stop_reason", "error", "done", ...}
+Event = Tuple[str, str]
+
+STREAM_FLUSH_MS = float(os.getenv("STREAM_FLUSH_MS", "16"))
+STREAM_FLUSH_BYTES = int(os.getenv("STREAM_FLUSH_BYTES", "256"))
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "64"))
+
+MEDIA_TYPES = {
+    "text": "text/plain; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+_END = object()
+
+
+async def coalesce(
+    events: AsyncIterator[Event],
+    max_bytes: int = STREAM_FLUSH_BYTES,
+    max_delay_ms: float = STREAM_FLUSH_MS,
+    queue_size: int = STREAM_QUEUE_SIZE,
+) -> AsyncIterator[Event]:
+    """Merge consecutive "token" events; flush after `max_bytes` or `max_delay_ms`.
+
+    Upstream is pulled by a producer task into a bounded queue, so a slow client
+    (the ASGI send awaiting) eventually pauses the graph instead of buffering
+    without limit. Non-token events flush pending tokens first and pass through.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    max_delay = max_delay_ms / 1000.0
+
+    async def produce():
+        try:
+            async for ev in events:
+                await queue.put(ev)
+        except Exception as e:   # surface upstream failures as an event
+            await queue.put(("error", str(e)))
+        finally:
+            # client gone / cancelled: make sure the graph run is torn down too
+            aclose = getattr(events, "aclose", None)
+            if aclose is not None:
+                await aclose()
+        await queue.put(_END)
+
+    producer = asyncio.create_task(produce())
+    buf, size, first_at = [], 0, 0.0
+    try:
+        while True:
+            if buf:
+                timeout = max(0.0, first_at + max_delay - time.monotonic())
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    yield ("token", "".join(buf))
+                    buf, size = [], 0
+                    continue
+            else:
+                item = await queue.get()
+
+            if item is _END:
+                break
+            kind, text = item
+            if kind == "token":
+                if not buf:
+                    first_at = time.monotonic()
+                buf.append(text)
+                size += len(text.encode("utf-8"))
+                if size >= max_bytes:
+                    yield ("token", "".join(buf))
+                    buf, size = [], 0
+                continue
+            if buf:
+                yield ("token", "".join(buf))
+                buf, size = [], 0
+            yield item
+        if buf:
+            yield ("token", "".join(buf))
+    finally:
+        producer.cancel()
+
+
+def frame(kind: str, text: str, fmt: str = "text") -> str:
+    """Render one event for the wire."""
+    if fmt == "ndjson":
+        return json.dumps({"event": kind, "data": text}, ensure_ascii=False) + "\n"
+    if fmt == "sse":
+        return f"event: {kind}\ndata: {json.dumps(text, ensure_ascii=False)}\n\n"
+    # plain text keeps the original /chat output
+    if kind == "token":
+        return text
+    if kind == "tool_result":
+        return f"\n\n---\n**Tool result**:\n{text}\n"
+    if kind == "error":
+        return f"\n[ERROR] {text}"
+    if kind == "stop_reason":
+        return f"\n\n_(stopped early: {text})_\n"
+    return ""
+
+
+async def framed(events: AsyncIterator[Event], fmt: str = "text", **coalesce_kwargs) -> AsyncIterator[str]:
+    async for kind, text in coalesce(events, **coalesce_kwargs):
+        chunk = frame(kind, text, fmt)
+        if chunk:
+            yield chunk
+
+
+def pick_format(requested: str = "", accept: str = "") -> str:
+    """Explicit body "format" wins; otherwise sniff the Accept header."""
+    requested = (requested or "").lower()
+    if requested in MEDIA_TYPES:
+        return requested
+    accept = (accept or "").lower()
+    if "text/event-stream" in accept:
+        return "sse"
+    if "application/x-ndjson" in accept:
+        return "ndjson"
+    return "text"
@@ -0,0 +1,30 @@
+from knowledge_graph_formatter import _split_chunks
+
+ITEMS = ["Machine Learning with Scikit-learn", "Deep Learning with PyTorch", "Feature Engineering",
+         "Time Series Forecasting", "Natural Language Processing"]
+
+
+def test_long_paragraph_splits_on_lines():
+    # one paragraph (no blank lines) far longer than max_chars
+    lines = [f"- {ITEMS[i % len(ITEMS)]} {i}" for i in range(60)]
+    doc = "\n".join(lines)
+    chunks = _split_chunks(doc, 200)
+    assert len(chunks) > 1
+    assert all(len(c) <= 200 for c in chunks)
+    for line in lines:
+        assert any(line in c for c in chunks), line
+
+
+def test_long_line_splits_on_words():
+    words = " ".join(ITEMS * 20).split()
+    doc = " ".join(words)
+    chunks = _split_chunks(doc, 120)
+    assert len(chunks) > 1
+    assert all(len(c) <= 120 for c in chunks)
+    assert [w for c in chunks for w in c.split()] == words
+
+
+def test_only_oversized_words_are_sliced():
+    chunks = _split_chunks("short " + "x" * 50 + " tail", 20)
+    assert all(len(c) <= 20 for c in chunks)
+    assert "".join(chunks).replace(" ", "") == "short" + "x" * 50 + "tail"
@@ -0,0 +1,46 @@
+import pytest
+
+from semantic_cache import SemanticCache, HashingEmbedder, LangChainEmbedder, constraints
+
+BASE = "What skills do I need to become a data scientist?"
+
+
+@pytest.fixture
+def cache():
+    c = SemanticCache(embedder=HashingEmbedder(), threshold=0.93)
+    c.store(BASE, "generic answer")
+    return c
+
+
+@pytest.mark.parametrize("question", [
+    "What soft skills do I need to become a data scientist?",
+    "What skills do I need to become a senior data scientist?",
+    "What skills do I need to become a junior data scientist?",
+    "What skills do I need to become a data scientist without a degree?",
+])
+def test_narrower_question_misses(cache, question):
+    assert cache.lookup(question) is None
+
+
+@pytest.mark.parametrize("question", [
+    "Which skills does a data scientist need to become?",
+    "what skills do i need to become a data scientist",
+    "What skill do I need to become a data scientist?",
+])
+def test_paraphrase_hits(cache, question):
+    assert cache.lookup(question) == "generic answer"
+
+
+def test_qualifiers_guard_dense_embedders():
+    # dense embedders only get the constraint-word guard, which must cover qualifiers too
+    assert constraints("soft skills for a data scientist") != constraints("skills for a data scientist")
+    assert constraints("senior data scientist skills") != constraints("data scientist skills")
+
+    class Same:
+        def embed_query(self, text):
+            return [1.0, 0.0]
+
+    c = SemanticCache(embedder=LangChainEmbedder(Same()), threshold=0.88)
+    c.store(BASE, "generic answer")
+    assert c.lookup("What soft skills do I need to become a data scientist?") is None
+    assert c.lookup("Which skills does a data scientist need to become?") == "generic answer"
@@ -1,34 +1,70 @@
-from langchain_core.tools import tool
-from role_agent import load_role_data, get_role_details
-from resource_agent import search_youtube_videos, search_github_repos
+from langchain_core.tools import tool, StructuredTool
+from role_agent import get_role_details
+from metrics import timed_tool
+from resource_agent import (
+    search_youtube_videos, search_github_repos,
+    asearch_youtube_videos, asearch_github_repos,
+    youtube_query_for, github_query_for,
+)
 
 # Tool 1: Role Info Tool
 @tool
+@timed_tool("get_role_info")
 def get_role_info(role: str) -> dict:
     """Return overview, skills, tools, projects, and interview topics for a given AI/ML role."""
     try:
-        data = load_role_data()
-        details = get_role_details(role, data)
-        return details
+        # served from the in-memory role catalog; tolerant of casing/aliases/typos
+        return get_role_details(role)
     except Exception as e:
         return {"error": str(e)}
 
 # Tool 2: YouTube Fetch Tool
-@tool
-def get_youtube_resources(role: str) -> list:
+@timed_tool("get_youtube_resources")
+def _youtube_resources(role: str) -> list:
     """Return top 5 YouTube videos for the given AI/ML role."""
     try:
-        query = f"{role} roadmap tutorial"
+        query = youtube_query_for(role)
         return search_youtube_videos(query)
     except Exception as e:
         return [{"error": str(e)}]
 
+@timed_tool("get_youtube_resources")
+async def _ayoutube_resources(role: str) -> list:
+    """Return top 5 YouTube videos for the given AI/ML role."""
+    try:
+        query = youtube_query_for(role)
+        return await asearch_youtube_videos(query)
+    except Exception as e:
+        return [{"error": str(e)}]
+
+# Sync path for Streamlit/.invoke, non-blocking path for the async graph runs
+get_youtube_resources = StructuredTool.from_function(
+    func=_youtube_resources,
+    coroutine=_ayoutube_resources,
+    name="get_youtube_resources",
+)
+
 # Tool 3: GitHub Project Tool
-@tool
-def get_github_projects(role: str) -> list:
+@timed_tool("get_github_projects")
+def _github_projects(role: str) -> list:
     """Return top GitHub repositories related to the given role."""
     try:
-        query = f"{role} machine learning projects"
+        query = github_query_for(role)
         return search_github_repos(query)
     except Exception as e:
         return [{"error": str(e)}]
+
+@timed_tool("get_github_projects")
+async def _agithub_projects(role: str) -> list:
+    """Return top GitHub repositories related to the given role."""
+    try:
+        query = github_query_for(role)
+        return await asearch_github_repos(query)
+    except Exception as e:
+        return [{"error": str(e)}]
+
+get_github_projects = StructuredTool.from_function(
+    func=_github_projects,
+    coroutine=_agithub_projects,
+    name="get_github_projects",
+)